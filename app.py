@@ -1,19 +1,44 @@
 # app.py
 import streamlit as st
-from crewai import Crew
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
 
 from src.config.config_manager import ConfigurationManager
 from src.state.state_manager import StateManager, TravelPreferences
-from src.agents.travel_agents import create_async_travel_agents, create_travel_agents
+from src.state.itinerary_store import ItineraryStore
+from src.state.plan_cache import PlanCache, PreferenceHistory
+from src.agents.travel_agents import AGENT_PROFILES, ITINERARY_AGENTS, create_agent, create_travel_crew
+from src.agents.model_router import ModelRouter
 from src.tasks.travel_tasks import TravelTaskManager
+from src.tasks.scheduler import DAGScheduler
+from src.tasks.task_graph import TaskNode
+from src.tasks.prompt_layout import trip_request
+from src.tasks.fair_scheduler import FairScheduler, QuotaExceededError
+from src.tasks.plan_warmer import PlanWarmer
+from src.tasks.speculation import SpeculativePlanner
 from src.utils.error_handler import handle_error
 from src.utils.async_helpers import AsyncToSync, run_coroutine_in_thread
+from src.utils.cancellation import CancellationMetrics, CancellationToken, RunCancelledError, RunRegistry
+from src.utils.comparison import DestinationResult, parse_destinations
+from src.utils.profiler import ProfileRegistry
+from src.utils.itinerary_parser import parse_itinerary
+from src.agents.async_tracked_agent import AsyncActivityEmitter
+from src.models.activity import Activity
+from src.ui.session import get_session_id, get_user_id, is_session_active
 from src.ui.components import (
     render_travel_form,
     render_activities,
     render_final_plan,
-    render_feedback
+    render_feedback,
+    render_itinerary_days,
+    render_comparison_table,
+    render_queue_status,
+    render_debug_metrics,
+    render_profiler_controls
 )
 
 @handle_error("Failed to initialize application")
@@ -25,77 +50,356 @@ def initialize_app():
         st.stop()
     return config
 
-async def process_task_async(agent, task):
-    """Process a single task asynchronously"""
-    await agent._add_activity_async(f"🎯 Starting task: {task.description}")
-    try:
-        # Use regular execute_task since CrewAI doesn't support async execution
-        result = agent.execute_task(task)
-        chunks = [result[i:i+800] for i in range(0, len(result), 800)]
-        for i, chunk in enumerate(chunks):
-            prefix = "✅ Output (continued):\n" if i > 0 else "✅ Task output:\n"
-            await agent._add_activity_async(f"{prefix}{chunk}", 
-                                         "success" if i == len(chunks)-1 else "info")
+async def process_task_async(agent, task, context=None):
+    """Process a single task without blocking the event loop"""
+    # CrewAI doesn't support async execution, so run the tracked agent in a worker thread;
+    # AsyncTrackedAgent.execute_task emits the start/output/error activities itself
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None, functools.partial(agent.execute_task, task, context=context)
+    )
+
+async def run_routed_task(node, context, router, models, run_task, async_mode, token=None):
+    """Run a task on the model the router picks, failing over to the next model on errors.
+
+    Every attempt but the last is cut off at the task's SLA-derived timeout.
+    Such attempts run on an agent with a child token, cancelled on timeout so
+    the abandoned call stops streaming and posts no activities.
+    """
+    failed = []
+    attempts = router.max_attempts(node.name)
+    for attempt in range(attempts):
+        decision = router.select(node.name, exclude=failed)
+        timeout = router.call_timeout(node.name) if attempt < attempts - 1 else None
+        attempt_token = token.child() if token is not None and timeout is not None else token
+        if decision.model != models.get(node.name) or attempt_token is not token:
+            node.task.agent = create_agent(node.name, decision.model, async_mode, attempt_token)
+            # An agent on a child token can't be reused once its attempt is cut off
+            models[node.name] = decision.model if attempt_token is token else None
+        AsyncActivityEmitter.add_activity(Activity(
+            node.task.agent.role,
+            f"🧭 Routed to {decision.model} ({decision.tier} tier)",
+            "info",
+            metadata=decision.to_metadata(),
+            run_id=token.run_id if token is not None else None
+        ).to_dict())
+
+        started = time.time()
+        try:
+            result = await asyncio.wait_for(run_task(node.task.agent, node.task, context), timeout)
+        except RunCancelledError:
+            raise
+        except asyncio.TimeoutError:
+            if token is not None:
+                token.raise_if_cancelled()
+                attempt_token.cancel("timed out; failed over")
+            router.record(node.name, decision.model, time.time() - started, ok=False)
+            failed.append(decision.model)
+            AsyncActivityEmitter.add_activity(Activity(
+                node.task.agent.role,
+                f"⏱️ {decision.model} took over {timeout:.0f}s; failing over",
+                "info",
+                run_id=token.run_id if token is not None else None
+            ).to_dict())
+            continue
+        except Exception:
+            if token is not None and token.cancelled:
+                raise
+            if attempt_token is not token:
+                attempt_token.cancel("failed over")
+            router.record(node.name, decision.model, time.time() - started, ok=False)
+            failed.append(decision.model)
+            if attempt == attempts - 1:
+                raise
+            continue
+        router.record(node.name, decision.model, time.time() - started, ok=True)
+        publish_unstreamed_days(node, result, token)
         return result
+
+def publish_unstreamed_days(node, result, token=None):
+    """Publish an itinerary task's days from its full output if streaming didn't"""
+    if token is None or node.name not in ITINERARY_AGENTS:
+        return
+    role = node.task.agent.role
+    if not ItineraryStore.has_days(token.run_id, role):
+        for day in parse_itinerary(str(result), role):
+            ItineraryStore.publish(token.run_id, day, ITINERARY_AGENTS[node.name])
+
+async def run_travel_plan_graph(preferences: TravelPreferences, config, run_task, async_mode=True, token=None,
+                                seeded=None, limit=None):
+    """Build the task graph with routed models and run it with the DAG scheduler.
+
+    `seeded` maps task names to futures of results computed elsewhere, e.g. an
+    adopted speculative planner run; those tasks only run if the future fails.
+    `limit` is a concurrency limit shared with other graphs on the same loop.
+    """
+    if token is not None:
+        ProfileRegistry.track_thread(token.run_id)  # The event loop thread, when profiling
+    router = ModelRouter.from_config(config)
+    models = {name: router.select(name).model for name in AGENT_PROFILES}
+    agents = create_travel_crew(async_mode=async_mode, token=token, models=models)
+    graph = TravelTaskManager.create_travel_task_graph(
+        agents=agents,
+        destination=preferences.destination,
+        duration=preferences.duration,
+        budget=preferences.budget,
+        interests=preferences.interests,
+        task_concurrency=config.max_task_concurrency
+    )
+
+    async def execute(node, context):
+        if seeded and node.name in seeded:
+            try:
+                # Shielded so cancelling this run can't cancel the future under its producer
+                result = await asyncio.shield(asyncio.wrap_future(seeded[node.name]))
+                publish_unstreamed_days(node, result, token)
+                return result
+            except Exception:
+                if token is not None:
+                    token.raise_if_cancelled()
+        return await run_routed_task(node, context, router, models, run_task, async_mode, token)
+
+    scheduler = DAGScheduler(max_concurrency=config.max_parallel_tasks, limit=limit)
+    result = await scheduler.run(graph, execute, token)
+    return result.final_output
+
+async def process_travel_plan_async(preferences: TravelPreferences, config, token=None, seeded=None):
+    try:
+        return await run_travel_plan_graph(preferences, config, process_task_async, True, token, seeded)
+
+    except RunCancelledError:
+        raise
     except Exception as e:
-        await agent._add_activity_async(f"❌ Error executing task: {str(e)}", "error")
+        st.error(f"Error in async processing: {str(e)}")
         raise
 
-async def process_travel_plan_async(preferences: TravelPreferences, config):
-    try:
-        # Create agents
-        travel_planner, local_expert = create_async_travel_agents()
-        
-        # Create tasks
-        tasks = TravelTaskManager.create_travel_tasks(
-            agents=(travel_planner, local_expert),
+async def run_comparison(preferences_list, config, tokens):
+    """Plan several destinations concurrently under one shared task concurrency limit"""
+    # Every running task holds an executor thread, plus one while waiting on its per-task cap
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=2 * config.comparison_max_parallel_tasks)
+    )
+    limit = asyncio.Semaphore(config.comparison_max_parallel_tasks)
+
+    async def plan(preferences):
+        token = tokens[preferences.destination]
+        try:
+            result = await run_travel_plan_graph(
+                preferences, config, process_task_async, True, token, limit=limit
+            )
+            status, error = "done", None
+        except RunCancelledError as e:
+            result, status, error = "", "cancelled", e.reason
+        except Exception as e:
+            result, status, error = "", "failed", str(e)
+        return DestinationResult(
             destination=preferences.destination,
-            duration=preferences.duration,
-            budget=preferences.budget,
-            interests=preferences.interests
+            run_id=token.run_id,
+            status=status,
+            plan=str(result),
+            duration=time.time() - token.stats.started_at,
+            days=ItineraryStore.get_days(token.run_id),
+            first_day_latency=ItineraryStore.first_day_latency(token.run_id),
+            error=error
         )
 
-        # Process first task and store result
-        planner_task = tasks[0]
-        planner_result = await process_task_async(planner_task.agent, planner_task)
-        
-        # Pass result to local expert
-        expert_task = tasks[1]
-        expert_task.context = planner_result  # Add context from previous task
-        final_result = await process_task_async(expert_task.agent, expert_task)
+    return await asyncio.gather(*(plan(preferences) for preferences in preferences_list))
+
+async def run_speculative_planner(preferences: TravelPreferences, config, token):
+    """Run only the planner task, for a speculative run started before submission"""
+    router = ModelRouter.from_config(config)
+    models = {'travel_planner': router.select('travel_planner').model}
+    agent = create_agent('travel_planner', models['travel_planner'], True, token)
+    node = TaskNode(name='travel_planner', task=TravelTaskManager.create_planner_task(agent))
+    # Same context as the planner node of the full graph, so an adopted result matches it
+    context = trip_request(preferences.destination, preferences.duration, preferences.budget, preferences.interests)
+    return await run_routed_task(node, context, router, models, process_task_async, True, token)
 
-        return final_result
+def process_travel_plan_sync(preferences: TravelPreferences, config, token=None):
+    """Process travel plan synchronously"""
+    try:
+        # TrackedAgent writes to session state, so worker threads need the script context
+        script_ctx = get_script_run_ctx()
+
+        def execute_in_ctx(agent, task, context):
+            add_script_run_ctx(threading.current_thread(), script_ctx)
+            return agent.execute_task(task, context=context)
+
+        async def run_task(agent, task, context):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, execute_in_ctx, agent, task, context)
 
+        with AsyncToSync() as loop:
+            return loop.run_until_complete(
+                run_travel_plan_graph(preferences, config, run_task, False, token)
+            )
+
+    except RunCancelledError:
+        raise
     except Exception as e:
-        st.error(f"Error in async processing: {str(e)}")
+        st.error(f"Error in sync processing: {str(e)}")
         raise
 
-def process_travel_plan_sync(preferences: TravelPreferences, config):
-    """Process travel plan synchronously"""
+def start_plan_run(preferences: TravelPreferences, config, session_id: str, speculation=None):
+    """Queue a plan run for the session, cancelling its previous run.
+
+    An adopted speculative run lends the new run its id, so its activities and
+    parsed days carry over, and its planner result.
+    """
+    # Instead of using create_task directly, use run_coroutine_in_thread
+    token = None
     try:
-        # Create agents
-        travel_planner, local_expert = create_travel_agents()
-        
-        # Create tasks
-        tasks = TravelTaskManager.create_travel_tasks(
-            agents=(travel_planner, local_expert),
-            destination=preferences.destination,
-            duration=preferences.duration,
-            budget=preferences.budget,
-            interests=preferences.interests
+        # Check the quota first: a rejected submit must not cancel the session's current run
+        scheduler = FairScheduler.get_instance(config)
+        scheduler.check_quota(get_user_id())
+
+        # Start processing in background, cancelling this session's previous run
+        st.session_state.processing = True
+        seeded = None
+        if speculation:
+            token = RunRegistry.start_run(session_id, config.run_deadline_seconds, speculation.token.run_id)
+            ItineraryStore.adopt_run(token.run_id, token.stats.started_at)
+            token.on_cancel(lambda: speculation.token.cancel(token.reason or "cancelled"))
+            seeded = {'travel_planner': speculation.future}
+            AsyncActivityEmitter.add_activity(Activity(
+                "Scheduler",
+                f"⚡ Planner started {token.stats.started_at - speculation.job.started_at:.0f}s before you submitted",
+                "info",
+                run_id=token.run_id
+            ).to_dict())
+        else:
+            token = RunRegistry.start_run(session_id, config.run_deadline_seconds)
+            ItineraryStore.start_run(token.run_id, token.stats.started_at)
+        st.session_state.current_run_id = token.run_id
+        if config.debug_mode and st.session_state.get('profile_next_run'):
+            # Profile this run and the reruns that render it
+            ProfileRegistry.start(session_id, token.run_id)
+            st.session_state.profile_next_run = False
+
+        def background_task():
+            status, messages = "failed", []
+            ProfileRegistry.track_thread(token.run_id)
+            try:
+                result = run_coroutine_in_thread(
+                    process_travel_plan_async(preferences, config, token, seeded)
+                )
+                # Delivered through the run's outcome, so only this session renders it
+                if result and not token.cancelled:
+                    messages.append(result)
+                    PlanCache.put(preferences, result, token.stats.tokens_used or len(result) // 4,
+                                  source="interactive")
+                    status = "done"
+            except RunCancelledError as e:
+                status = "cancelled"
+                reclaimed = CancellationMetrics.record_cancelled(token.stats)
+                AsyncActivityEmitter.add_activity(Activity(
+                    "Scheduler",
+                    f"🛑 {str(e)}. Discarded ~{token.stats.tokens_streamed} streamed tokens, "
+                    f"skipped {token.stats.tasks_skipped} tasks (~{reclaimed:.0f}s of worker time reclaimed)",
+                    "error",
+                    run_id=token.run_id
+                ).to_dict())
+            except Exception as e:
+                print(f"Error in background task: {str(e)}")
+            finally:
+                RunRegistry.finish_run(session_id, token, status, messages)
+                if ProfileRegistry.is_active(session_id):
+                    ProfileRegistry.untrack_thread(token.run_id)
+                    ProfileRegistry.mark_run_finished(session_id)
+
+        # Queue the run behind other users' runs instead of starting a thread per submit
+        scheduler.submit(
+            flow_id=get_user_id(), fn=background_task, token=token, job_id=token.run_id,
+            on_drop=lambda: RunRegistry.finish_run(session_id, token, "cancelled")
         )
-        
-        # Create and execute crew
-        crew = Crew(
-            agents=[travel_planner, local_expert],
-            tasks=tasks,
-            verbose=config.debug_mode
+
+    except QuotaExceededError as e:
+        if token is not None:
+            token.cancel("quota exceeded")
+            RunRegistry.finish_run(session_id, token, "cancelled")
+        elif speculation:
+            speculation.token.cancel("quota exceeded")
+        # Leave `processing` and current_run_id alone so the session still collects its current run
+        st.warning(str(e))
+    except Exception as e:
+        st.error(f"Error starting processing: {str(e)}")
+        st.session_state.processing = False
+
+def collect_finished_run():
+    """Clear `processing` once the session's current run has recorded its outcome"""
+    run_id = st.session_state.get('current_run_id')
+    if not st.session_state.get('processing') or not run_id:
+        return
+    outcome = RunRegistry.pop_outcome(run_id)
+    if outcome:
+        for content in outcome.messages:
+            StateManager.add_message("assistant", content)
+        st.session_state.last_run_status = outcome.status
+        st.session_state.processing = False
+
+def start_comparison_run(preferences_list, config, session_id: str):
+    """Queue one job that plans every destination of a comparison side by side"""
+    token = None
+    try:
+        scheduler = FairScheduler.get_instance(config)
+        scheduler.check_quota(get_user_id())
+        st.session_state.processing = True
+        token = RunRegistry.start_run(session_id, config.run_deadline_seconds)
+        st.session_state.current_run_id = token.run_id
+        comparison = {"run_ids": {}, "results": {}, "activities": {}}
+        to_plan, tokens = [], {}
+        for preferences in preferences_list:
+            child = CancellationToken(config.run_deadline_seconds)
+            comparison["run_ids"][preferences.destination] = child.run_id
+            cached = PlanCache.get(preferences)
+            if cached:
+                comparison["results"][preferences.destination] = DestinationResult(
+                    destination=preferences.destination, run_id=child.run_id, status="cached",
+                    plan=cached.plan, days=[day.to_dict() for day in parse_itinerary(cached.plan, "cache")]
+                )
+                continue
+            token.on_cancel(lambda child=child: child.cancel(token.reason or "cancelled"))
+            ItineraryStore.start_run(child.run_id, child.stats.started_at)
+            to_plan.append(preferences)
+            tokens[preferences.destination] = child
+        st.session_state.comparison = comparison
+
+        def background_task():
+            status, messages = "failed", []
+            try:
+                results = run_coroutine_in_thread(run_comparison(to_plan, config, tokens)) if to_plan else []
+                for result in results:
+                    comparison["results"][result.destination] = result
+                    if result.status == "done":
+                        preferences = next(p for p in to_plan if p.destination == result.destination)
+                        used = tokens[result.destination].stats.tokens_used
+                        PlanCache.put(preferences, result.plan, used or len(result.plan) // 4,
+                                      source="interactive")
+                for preferences in preferences_list:
+                    result = comparison["results"].get(preferences.destination)
+                    if result and result.plan and not token.cancelled:
+                        messages.append(f"## {result.destination}\n\n{result.plan}")
+                status = "cancelled" if token.cancelled else "done" if messages else "failed"
+            except Exception as e:
+                print(f"Error in comparison task: {str(e)}")
+            finally:
+                RunRegistry.finish_run(session_id, token, status, messages)
+
+        # One job for the whole comparison, costed as one run per destination
+        scheduler.submit(
+            flow_id=get_user_id(), fn=background_task, token=token, cost=len(to_plan) or 1,
+            job_id=token.run_id, on_drop=lambda: RunRegistry.finish_run(session_id, token, "cancelled")
         )
-        return crew.kickoff()
 
+    except QuotaExceededError as e:
+        if token is not None:
+            token.cancel("quota exceeded")
+            RunRegistry.finish_run(session_id, token, "cancelled")
+        # Leave `processing` and current_run_id alone so the session still collects its current run
+        st.warning(str(e))
     except Exception as e:
-        st.error(f"Error in sync processing: {str(e)}")
-        raise
+        st.error(f"Error starting comparison: {str(e)}")
+        st.session_state.processing = False
 
 def main():
     st.title("Travel Planning Assistant")
@@ -103,60 +407,117 @@ def main():
     # Initialize application
     config = initialize_app()
     StateManager.initialize_session_state()
+    session_id = get_session_id()
+    ProfileRegistry.track_session_thread(session_id)
+    RunRegistry.start_watchdog(is_session_active)
+    # Without warming, users asking again expect a fresh plan rather than one from hours ago
+    PlanCache.configure(config.plan_cache_ttl_seconds, config.peak_hours,
+                        cache_interactive=config.warm_token_budget_per_hour > 0)
+    PlanWarmer.start(
+        config,
+        lambda preferences, token: run_coroutine_in_thread(
+            process_travel_plan_async(preferences, config, token)
+        )
+    )
+    speculator = SpeculativePlanner.start(
+        config,
+        lambda preferences, token: run_coroutine_in_thread(
+            run_speculative_planner(preferences, config, token)
+        )
+    )
     
     # Initialize messages if not exists
     if 'messages' not in st.session_state:
         st.session_state.messages = []
 
+    # Pick up the current run's outcome and final plan before deciding whether to speculate
+    collect_finished_run()
+
     # Render travel preferences form
-    submitted, destination, duration, budget, interests = render_travel_form()
+    submitted, destination, duration, budget, interests = render_travel_form(speculative=speculator is not None)
+
+    destinations, dropped = parse_destinations(destination)
+    if submitted and dropped:
+        st.info(f"Comparing the first {len(destinations)} destinations; skipped {', '.join(dropped)}")
 
-    if submitted and destination and interests:  # Add validation
+    if speculator and not submitted and not st.session_state.get('processing'):
+        # Start planning once the inputs settle; a matching submit adopts the run
+        if len(destinations) == 1 and interests:
+            speculator.observe(session_id, get_user_id(), TravelPreferences(
+                destination=destinations[0],
+                duration=duration,
+                budget=budget,
+                interests=interests
+            ))
+        else:
+            speculator.discard(session_id, "inputs incomplete")
+
+    if submitted and len(destinations) > 1 and interests:
+        # Comparison mode: plan every destination side by side
+        StateManager.clear_activities()
+        st.session_state.messages = []
+        if speculator:
+            speculator.discard(session_id, "comparing destinations")
+        preferences_list = [
+            TravelPreferences(destination=name, duration=duration, budget=budget, interests=interests)
+            for name in destinations
+        ]
+        for preferences in preferences_list:
+            PreferenceHistory.record(preferences)
+        start_comparison_run(preferences_list, config, session_id)
+
+    elif submitted and destinations and interests:  # Add validation
         # Clear previous activities
         StateManager.clear_activities()
+        st.session_state.comparison = None
         
         # Create preferences object
         preferences = TravelPreferences(
-            destination=destination,
+            destination=destinations[0],
             duration=duration,
             budget=budget,
             interests=interests
         )        
         
-        # Instead of using create_task directly, use run_coroutine_in_thread
-        try:
-            # Start processing in background
-            st.session_state.processing = True
-            
-            def background_task():
-                try:
-                    result = run_coroutine_in_thread(
-                        process_travel_plan_async(preferences, config)
-                    )
-                    # Use thread-safe message addition
-                    if result:
-                        StateManager.add_message_safe("assistant", result)
-                    st.session_state.processing = False
-                except Exception as e:
-                    print(f"Error in background task: {str(e)}")
-
-            # Run in a thread to not block Streamlit
-            import threading
-            thread = threading.Thread(target=background_task)
-            thread.daemon = True
-            thread.start()
-            
-        except Exception as e:
-            st.error(f"Error starting processing: {str(e)}")
+        PreferenceHistory.record(preferences)
+        cached = PlanCache.get(preferences)
+
+        if cached:
+            # A warmed or recently computed plan for the same preferences
+            if speculator:
+                speculator.discard(session_id, "served from cache")
+            # Nothing will collect a run still in flight, so stop it instead of rerunning forever
+            RunRegistry.cancel_session(session_id, "served from cache")
             st.session_state.processing = False
+            st.session_state.current_run_id = None
+            StateManager.add_activity(Activity(
+                "Scheduler",
+                f"⚡ Served a plan computed {(time.time() - cached.created_at) / 60:.0f} minutes ago",
+                "success",
+                metadata={"cache_source": cached.source}
+            ).to_dict())
+            StateManager.add_message("assistant", cached.plan)
 
-    # Process any pending messages
-    StateManager.process_pending_messages()
+        else:
+            speculation = speculator.adopt(session_id, preferences) if speculator else None
+            start_plan_run(preferences, config, session_id, speculation)
 
-    # Render UI components
+    # Render UI components; the activity thread reruns the script while processing,
+    # so anything that must update live goes before it
+    if st.session_state.get('processing') and st.session_state.get('current_run_id'):
+        render_queue_status(FairScheduler.get_instance(config).status(st.session_state.current_run_id))
+    render_itinerary_days()
+    render_comparison_table()
     render_activities()
     render_final_plan()
     render_feedback()
+    if config.debug_mode:
+        render_debug_metrics()
+        if ProfileRegistry.is_active(session_id):
+            profile_paths = ProfileRegistry.finish_if_done(session_id)
+            if profile_paths:
+                st.session_state.profile_paths = profile_paths
+        render_profiler_controls()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
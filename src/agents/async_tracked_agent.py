@@ -1,11 +1,15 @@
 # src/agents/async_tracked_agent.py
 from typing import Optional, Any, Dict
+from collections import OrderedDict
 import asyncio
 import queue
 import threading
+import time
 from crewai import Agent
+from .base import is_attempt_abandoned, raise_if_run_cancelled
 from ..models.activity import Activity
 from ..state.state_manager import StateManager
+from ..utils.profiler import ProfileRegistry
 
 class AsyncActivityEmitter:
     """Handles async emission of activities to state manager"""
@@ -23,6 +27,11 @@ class AsyncActivityEmitter:
     def __init__(self):
         self._stop_event = threading.Event()
 
+    # Activities tagged with a run id are buffered per run, so each session only
+    # drains its own run and background runs never show up in a user's thread
+    _run_buffers: "OrderedDict[str, list]" = OrderedDict()
+    _max_run_buffers = 200
+
     @classmethod
     def add_activity(cls, activity: Dict[str, Any]):
         """Thread-safe activity addition"""
@@ -30,21 +39,43 @@ class AsyncActivityEmitter:
             # Add timestamp if not present
             if 'timestamp' not in activity:
                 activity['timestamp'] = time.time()
-            cls._global_queue.put(activity)
+            run_id = activity.get('run_id')
+            if run_id is None:
+                cls._global_queue.put(activity)
+                return
+            with cls._lock:
+                cls._run_buffers.setdefault(run_id, []).append(activity)
+                while len(cls._run_buffers) > cls._max_run_buffers:
+                    cls._run_buffers.popitem(last=False)
         except Exception as e:
             print(f"Error adding activity to queue: {str(e)}")
 
     @classmethod
-    def get_pending_activities(cls) -> list:
-        """Get all pending activities"""
+    def get_pending_activities(cls, run_id: Optional[str] = None) -> list:
+        """Get all pending untagged activities plus those of the given run"""
         activities = []
         try:
             while not cls._global_queue.empty():
                 activities.append(cls._global_queue.get_nowait())
         except queue.Empty:
             pass
+        if run_id is not None:
+            with cls._lock:
+                activities.extend(cls._run_buffers.pop(run_id, []))
         return activities
 
+    @classmethod
+    def discard_run(cls, run_id: str):
+        """Drop buffered activities of a run nobody will display"""
+        with cls._lock:
+            cls._run_buffers.pop(run_id, None)
+
+    @classmethod
+    def pending_count(cls) -> int:
+        with cls._lock:
+            buffered = sum(len(activities) for activities in cls._run_buffers.values())
+        return cls._global_queue.qsize() + buffered
+
     def stop_processing(self):
         """Stops the background processing"""
         self._stop_event.set()
@@ -52,10 +83,11 @@ class AsyncActivityEmitter:
 class AsyncTrackedAgent(Agent):
     """Agent that supports both synchronous and asynchronous activity tracking"""
     
-    def __init__(self, role: str, goal: str, backstory: str, **kwargs):
+    def __init__(self, role: str, goal: str, backstory: str, run_id: Optional[str] = None, **kwargs):
         # First initialize the parent Agent class
         super().__init__(role=role, goal=goal, backstory=backstory, **kwargs)
         # Then initialize our AsyncActivityEmitter
+        self._run_id = run_id
         self._activity_emitter = None
         self._initialize_emitter()
 
@@ -72,12 +104,16 @@ class AsyncTrackedAgent(Agent):
 
     async def _add_activity_async(self, content: str, activity_type: str = "info"):
         """Adds activity asynchronously"""
-        activity = Activity(self.role, content, activity_type)
+        if is_attempt_abandoned(self.llm):
+            return
+        activity = Activity(self.role, content, activity_type, run_id=self._run_id)
         self.activity_emitter.add_activity(activity.to_dict())
 
     def _add_activity(self, content: str, activity_type: str = "info"):
         """Synchronous activity addition"""
-        activity = Activity(self.role, content, activity_type)
+        if is_attempt_abandoned(self.llm):
+            return
+        activity = Activity(self.role, content, activity_type, run_id=self._run_id)
         self.activity_emitter.add_activity(activity.to_dict())
 
     async def execute_task_async(self, task, context=None, tools=None):
@@ -100,6 +136,8 @@ class AsyncTrackedAgent(Agent):
 
     def execute_task(self, task, context=None, tools=None):
         """Synchronous task execution with activity tracking"""
+        ProfileRegistry.track_thread(self._run_id)
+        raise_if_run_cancelled(self.llm)
         self._add_activity(f"🎯 Starting task: {task.description}")
         try:
             result = super().execute_task(task, context=context, tools=tools)
@@ -3,8 +3,20 @@ from crewai import Agent
 from ..models.activity import Activity
 from typing import Optional, Any
 
+def raise_if_run_cancelled(llm) -> None:
+    """crewai retries a failed task by calling execute_task again; a cancelled run must not start over"""
+    token = getattr(llm, 'token', None)
+    if token is not None:
+        token.raise_if_cancelled()
+
+def is_attempt_abandoned(llm) -> bool:
+    """Whether the agent's attempt was cut off while its run goes on; its activities would duplicate the retry's"""
+    token = getattr(llm, 'token', None)
+    return token is not None and token.abandoned
+
 class TrackedAgent(Agent):
     def execute_task(self, task, context=None, tools=None):
+        raise_if_run_cancelled(self.llm)
         self._add_activity(f"🎯 Starting task: {task.description}")
         try:
             result = super().execute_task(task, context=context, tools=tools)
@@ -21,6 +33,8 @@ class TrackedAgent(Agent):
     def _add_activity(self, content: str, activity_type: str = "info"):
         """Helper method to add activities to session state."""
         import streamlit as st
+        if is_attempt_abandoned(self.llm):
+            return
         activity = Activity(self.role, content, activity_type)
         if 'agent_activities' not in st.session_state:
             st.session_state.agent_activities = []
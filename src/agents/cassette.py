@@ -0,0 +1,96 @@
+# src/agents/cassette.py
+import hashlib
+import json
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+import httpx
+
+# Headers that no longer describe the body once httpx has decoded it
+_DROPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+def request_key(payload: Dict[str, Any]) -> str:
+    """Stable key for a chat completion request, ignoring sampling options"""
+    relevant = {"model": payload.get("model"), "messages": payload.get("messages")}
+    return hashlib.sha1(json.dumps(relevant, sort_keys=True).encode()).hexdigest()
+
+@dataclass
+class Interaction:
+    """One recorded request/response exchange with its timing"""
+    key: str
+    path: str
+    request: Dict[str, Any]
+    status: int
+    headers: Dict[str, str]
+    body: str
+    ttfb: float
+    elapsed: float
+    recorded_at: float = field(default_factory=time.time)
+
+    @property
+    def streamed(self) -> bool:
+        return self.headers.get('content-type', '').startswith('text/event-stream')
+
+class Cassette:
+    """Append-only JSONL file of recorded LLM exchanges"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, interaction: Interaction) -> None:
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(asdict(interaction)) + "\n")
+
+    def load(self) -> List[Interaction]:
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return [Interaction(**json.loads(line)) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+class RecordingTransport(httpx.BaseTransport):
+    """httpx transport that records every exchange into a cassette.
+
+    Responses are read in full before being handed back, so streamed
+    completions arrive at once while recording.
+    """
+
+    def __init__(self, cassette: Cassette, transport: Optional[httpx.BaseTransport] = None):
+        self.cassette = cassette
+        self._transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.time()
+        response = self._transport.handle_request(request)
+        ttfb = time.time() - started
+        body = response.read()
+        elapsed = time.time() - started
+        response.close()
+
+        try:
+            payload = json.loads(request.content or b"{}")
+        except ValueError:
+            payload = {}
+        headers = {k.lower(): v for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS}
+        self.cassette.append(Interaction(
+            key=request_key(payload),
+            path=request.url.path,
+            request=payload,
+            status=response.status_code,
+            headers=headers,
+            body=body.decode('utf-8', errors='replace'),
+            ttfb=ttfb,
+            elapsed=elapsed
+        ))
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=headers,
+            content=body,
+            request=request
+        )
+
+    def close(self) -> None:
+        self._transport.close()
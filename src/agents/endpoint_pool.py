@@ -0,0 +1,306 @@
+# src/agents/endpoint_pool.py
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterator, List, Optional, Set
+import httpx
+from ..utils.error_handler import logger
+from ..utils.stats import percentile
+
+@dataclass
+class Endpoint:
+    """One OpenAI-compatible backend and its recent behaviour"""
+    base_url: str
+    outstanding: int = 0
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=100))
+    consecutive_failures: int = 0
+    ejected_until: float = 0.0
+    ejections: int = 0
+    requests: int = 0
+
+    @property
+    def available(self) -> bool:
+        return self.ejected_until <= time.time()
+
+    @property
+    def p50_latency(self) -> float:
+        return percentile(list(self.latencies), 50)
+
+    def tail_latency(self, pct: float) -> float:
+        return percentile(list(self.latencies), pct)
+
+class EndpointPool:
+    """Client-side load balancing across OpenAI-compatible backends.
+
+    Requests go to the available endpoint with the fewest outstanding
+    requests. An endpoint is ejected for `eject_seconds` after
+    `failure_threshold` consecutive failures, or once it has `min_samples`
+    recent requests and their `tail_percentile` time to first byte exceeds
+    `slow_factor` times the pool-wide median. Comparing the tail catches a
+    backend that stalls often but is usually fast, which a median misses.
+    A background health check probes GET /models and returns ejected
+    endpoints to rotation early once they answer again. If every
+    endpoint is ejected the pool fails open to the one returning soonest.
+    """
+    _instance: Optional["EndpointPool"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, base_urls: List[str], api_key: Optional[str] = None,
+                 failure_threshold: int = 3, slow_factor: float = 3.0, min_samples: int = 30,
+                 tail_percentile: float = 90.0, eject_seconds: float = 30.0, health_interval: float = 10.0,
+                 hedge_percentile: Optional[float] = None, max_hedge_ratio: float = 0.1):
+        self.endpoints = [Endpoint(url.rstrip('/')) for url in base_urls]
+        self.api_key = api_key
+        self.failure_threshold = failure_threshold
+        self.slow_factor = slow_factor
+        self.min_samples = min_samples
+        self.tail_percentile = tail_percentile
+        self.eject_seconds = eject_seconds
+        self.health_interval = health_interval
+        self.hedge_percentile = hedge_percentile
+        self.max_hedge_ratio = max_hedge_ratio
+        self._latencies: Deque[float] = deque(maxlen=200)
+        self._tiebreak = itertools.count()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._health_thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def get_instance(cls, base_urls: List[str], api_key: Optional[str] = None,
+                     hedge_percentile: Optional[float] = None) -> "EndpointPool":
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(base_urls, api_key=api_key, hedge_percentile=hedge_percentile)
+                cls._instance.start_health_checks()
+            return cls._instance
+
+    @property
+    def base_url(self) -> str:
+        """Nominal base URL for clients; PooledTransport rewrites it per request"""
+        return self.endpoints[0].base_url
+
+    def start_health_checks(self) -> None:
+        if self._health_thread is None and self.health_interval > 0:
+            self._health_thread = threading.Thread(target=self._health_loop, name="endpoint-health",
+                                                   daemon=True)
+            self._health_thread.start()
+
+    def _health_loop(self) -> None:
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        with httpx.Client(timeout=2.0, headers=headers) as client:
+            while True:
+                time.sleep(self.health_interval)
+                for endpoint in self.endpoints:
+                    try:
+                        healthy = client.get(f"{endpoint.base_url}/models").status_code < 500
+                    except httpx.HTTPError:
+                        healthy = False
+                    self._record_health(endpoint, healthy)
+
+    def _record_health(self, endpoint: Endpoint, healthy: bool) -> None:
+        with self._lock:
+            if not healthy:
+                endpoint.consecutive_failures = max(endpoint.consecutive_failures, self.failure_threshold)
+                self._eject(endpoint, "health check failed")
+            elif not endpoint.available and endpoint.consecutive_failures >= self.failure_threshold:
+                # Back early from a failure ejection; slow endpoints wait out their ejection
+                endpoint.ejected_until = 0.0
+                endpoint.consecutive_failures = 0
+                endpoint.latencies.clear()
+
+    def acquire(self, exclude: Optional[Set[str]] = None) -> Optional[Endpoint]:
+        """Pick the least-loaded available endpoint and count the request against it"""
+        with self._lock:
+            candidates = [e for e in self.endpoints if not exclude or e.base_url not in exclude]
+            if not candidates:
+                return None
+            available = [e for e in candidates if e.available]
+            if available:
+                endpoint = min(available, key=lambda e: (e.outstanding, e.p50_latency, next(self._tiebreak)))
+            else:
+                endpoint = min(candidates, key=lambda e: e.ejected_until)
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def release(self, endpoint: Endpoint) -> None:
+        with self._lock:
+            endpoint.outstanding = max(0, endpoint.outstanding - 1)
+
+    def record(self, endpoint: Endpoint, latency: float, ok: bool) -> None:
+        """Record time to first byte, or a failure, and eject the endpoint if it is an outlier"""
+        with self._lock:
+            if not ok:
+                endpoint.consecutive_failures += 1
+                if endpoint.consecutive_failures >= self.failure_threshold:
+                    self._eject(endpoint, f"{endpoint.consecutive_failures} consecutive failures")
+                return
+            endpoint.consecutive_failures = 0
+            endpoint.latencies.append(latency)
+            self._latencies.append(latency)
+            if len(endpoint.latencies) < self.min_samples:
+                return
+            tail = endpoint.tail_latency(self.tail_percentile)
+            pool_median = percentile(list(self._latencies), 50)
+            if tail > self.slow_factor * pool_median:
+                self._eject(endpoint, f"p{self.tail_percentile:g} latency {tail:.2f}s "
+                                      f"against a pool median of {pool_median:.2f}s")
+
+    def _eject(self, endpoint: Endpoint, reason: str) -> None:
+        # Never eject the last available endpoint
+        if endpoint.available and sum(1 for e in self.endpoints if e.available) > 1:
+            endpoint.ejected_until = time.time() + self.eject_seconds
+            endpoint.ejections += 1
+            endpoint.latencies.clear()
+            logger.warning(f"Ejected LLM endpoint {endpoint.base_url}: {reason}")
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before sending a duplicate request, or None to not hedge"""
+        with self._lock:
+            self.requests += 1
+            if self.hedge_percentile is None or len(self.endpoints) < 2:
+                return None
+            if len(self._latencies) < self.min_samples:
+                return None
+            if self.hedged >= self.max_hedge_ratio * self.requests:
+                return None
+            return percentile(list(self._latencies), self.hedge_percentile)
+
+    def record_hedge(self, won: bool) -> None:
+        with self._lock:
+            self.hedged += 1
+            self.hedge_wins += int(won)
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "endpoints": [{
+                    "base_url": e.base_url,
+                    "available": e.available,
+                    "outstanding": e.outstanding,
+                    "requests": e.requests,
+                    "ejections": e.ejections,
+                    "p50_latency": round(e.p50_latency, 3)
+                } for e in self.endpoints]
+            }
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """Response body that releases its endpoint once the caller closes it"""
+
+    def __init__(self, stream: httpx.SyncByteStream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            if self._on_close:
+                self._on_close()
+                self._on_close = None
+
+# Shared by all clients; each hedged request holds at most two threads briefly
+_hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+
+class PooledTransport(httpx.BaseTransport):
+    """httpx transport that sends each request to an endpoint chosen by the pool.
+
+    Requests are addressed to the pool's nominal base URL and rewritten to
+    the chosen endpoint. With hedging enabled, a request still waiting for
+    its first byte after the pool's hedge delay is duplicated to another
+    endpoint; the first response wins and the other is closed.
+    """
+
+    def __init__(self, pool: EndpointPool, transport: Optional[httpx.BaseTransport] = None):
+        self.pool = pool
+        self._transport = transport or httpx.HTTPTransport()
+
+    def _rewrite(self, request: httpx.Request, endpoint: Endpoint) -> httpx.Request:
+        url = str(request.url)
+        if url.startswith(self.pool.base_url):
+            url = endpoint.base_url + url[len(self.pool.base_url):]
+        # Drop Host so httpx derives it from the endpoint's URL; virtual hosts and proxies route on it
+        headers = [(name, value) for name, value in request.headers.raw if name.lower() != b"host"]
+        return httpx.Request(request.method, url, headers=headers, content=request.content,
+                             extensions=request.extensions)
+
+    def _send(self, request: httpx.Request, endpoint: Endpoint) -> httpx.Response:
+        started = time.time()
+        try:
+            response = self._transport.handle_request(self._rewrite(request, endpoint))
+        except Exception:
+            self.pool.record(endpoint, time.time() - started, ok=False)
+            self.pool.release(endpoint)
+            raise
+        self.pool.record(endpoint, time.time() - started, ok=response.status_code < 500)
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, lambda: self.pool.release(endpoint)),
+            extensions=response.extensions,
+            request=request
+        )
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()  # A hedged duplicate needs the body a second time
+        primary = self.pool.acquire()
+        delay = self.pool.hedge_delay()
+        if delay is None:
+            return self._send(request, primary)
+
+        first = _hedge_executor.submit(self._send, request, primary)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+        secondary = self.pool.acquire(exclude={primary.base_url})
+        if secondary is None:
+            return first.result()
+        second = _hedge_executor.submit(self._send, request, secondary)
+        return self._first_response([first, second])
+
+    def _first_response(self, attempts: List[Future]) -> httpx.Response:
+        pending = set(attempts)
+        winner: Optional[Future] = None
+        fallback: Optional[Future] = None
+        error: Optional[BaseException] = None
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                elif winner is None and future.result().status_code < 500:
+                    winner = future
+                elif fallback is None:
+                    fallback = future  # A server error, kept in case no attempt succeeds
+                else:
+                    _close_response(future)
+
+        if winner is None:
+            self.pool.record_hedge(won=False)
+            if fallback is not None:
+                return fallback.result()
+            raise error
+        if fallback is not None:
+            _close_response(fallback)
+        for loser in pending:
+            loser.add_done_callback(_close_response)
+        self.pool.record_hedge(won=winner is attempts[1])
+        return winner.result()
+
+    def close(self) -> None:
+        self._transport.close()
+
+def _close_response(future: Future) -> None:
+    if future.exception() is None:
+        future.result().close()
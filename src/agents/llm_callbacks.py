@@ -0,0 +1,49 @@
+# src/agents/llm_callbacks.py
+from typing import Any
+from langchain_core.callbacks import BaseCallbackHandler
+from ..state.itinerary_store import ItineraryStore
+from ..utils.cancellation import CancellationToken
+from ..utils.itinerary_parser import ItineraryStreamParser
+
+class CancellationCallbackHandler(BaseCallbackHandler):
+    """Stops a streaming LLM call as soon as its run is cancelled"""
+    raise_error = True
+
+    def __init__(self, token: CancellationToken):
+        self.token = token
+
+    def on_llm_start(self, serialized: Any, prompts: Any, **kwargs: Any) -> None:
+        self.token.raise_if_cancelled()
+
+    def on_chat_model_start(self, serialized: Any, messages: Any, **kwargs: Any) -> None:
+        self.token.raise_if_cancelled()
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        self.token.stats.tokens_streamed += 1
+        self.token.raise_if_cancelled()  # Also enforces the token limit
+
+class ItineraryCallbackHandler(BaseCallbackHandler):
+    """Parses streamed output into days and publishes each one as it completes"""
+
+    def __init__(self, run_id: str, source: str, source_rank: int = 0):
+        self.run_id = run_id
+        self.source = source
+        self.source_rank = source_rank
+        self._parser = ItineraryStreamParser(source)
+
+    def _publish(self, days) -> None:
+        for day in days:
+            ItineraryStore.publish(self.run_id, day, self.source_rank)
+
+    def on_llm_start(self, serialized: Any, prompts: Any, **kwargs: Any) -> None:
+        # Each LLM call of the agent's reasoning loop is a fresh stream
+        self._parser = ItineraryStreamParser(self.source)
+
+    def on_chat_model_start(self, serialized: Any, messages: Any, **kwargs: Any) -> None:
+        self._parser = ItineraryStreamParser(self.source)
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        self._publish(self._parser.feed(token))
+
+    def on_llm_end(self, response: Any, **kwargs: Any) -> None:
+        self._publish(self._parser.finish())
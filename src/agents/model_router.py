@@ -0,0 +1,171 @@
+# src/agents/model_router.py
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from ..utils.stats import percentile
+
+@dataclass
+class ModelStats:
+    """Rolling latency and error statistics for one model, or one model on one task.
+
+    Calls older than `max_age` seconds are dropped, so a model that was
+    skipped for degrading becomes eligible again once its bad samples expire.
+    """
+    window: int = 20
+    max_age: float = 300.0
+    calls: Deque[Tuple[float, float, bool]] = field(default_factory=deque)
+
+    def record(self, latency: float, ok: bool) -> None:
+        self.calls.append((time.time(), latency, ok))
+        while len(self.calls) > self.window:
+            self.calls.popleft()
+
+    def recent(self) -> List[Tuple[float, bool]]:
+        cutoff = time.time() - self.max_age
+        return [(latency, ok) for at, latency, ok in list(self.calls) if at >= cutoff]
+
+    @property
+    def p95_latency(self) -> float:
+        return percentile([latency for latency, ok in self.recent() if ok], 95)
+
+    @property
+    def error_rate(self) -> float:
+        calls = self.recent()
+        if not calls:
+            return 0.0
+        return sum(1 for _, ok in calls if not ok) / len(calls)
+
+@dataclass
+class RoutingDecision:
+    task: str
+    model: str
+    tier: str
+    reason: str
+    p95_latency: float
+    error_rate: float
+
+    def to_metadata(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "tier": self.tier,
+            "routing_reason": self.reason,
+            "model_p95_s": round(self.p95_latency, 2),
+            "model_error_rate": round(self.error_rate, 2)
+        }
+
+class ModelRouter:
+    """Picks a model per task from ordered tiers, failing over when a model degrades.
+
+    A task uses the first healthy model of its configured tier, then falls
+    through the remaining tiers in configuration order. A model is degraded
+    when its recent error rate (across all tasks) exceeds `max_error_rate`,
+    or when its p95 latency on that task exceeds the task's SLA. Calls are
+    also cut off after `timeout_factor` times the SLA so failover starts
+    within the budget.
+    """
+    _instance: Optional["ModelRouter"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, default_model: str,
+                 tiers: Optional[Dict[str, List[str]]] = None,
+                 task_tiers: Optional[Dict[str, str]] = None,
+                 task_slas: Optional[Dict[str, float]] = None,
+                 max_error_rate: float = 0.5,
+                 min_samples: int = 3,
+                 timeout_factor: float = 1.0):
+        self.default_model = default_model
+        self.tiers = tiers or {"default": [default_model]}
+        self.task_tiers = task_tiers or {}
+        self.task_slas = task_slas or {}
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.timeout_factor = timeout_factor
+        # Keyed by (task, model); task None holds the model's calls across all tasks
+        self._stats: Dict[Tuple[Optional[str], str], ModelStats] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> "ModelRouter":
+        """Shared router for the process, so statistics accumulate across runs"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(
+                    default_model=config.model_name,
+                    tiers=config.model_tiers,
+                    task_tiers=config.task_model_tiers,
+                    task_slas=config.task_latency_slas
+                )
+            return cls._instance
+
+    def candidates(self, task: str) -> List[Tuple[str, str]]:
+        """(tier, model) pairs in the order they should be tried for a task"""
+        preferred = self.task_tiers.get(task)
+        ordered = ([preferred] if preferred in self.tiers else []) + [t for t in self.tiers if t != preferred]
+        pairs, seen = [], set()
+        for tier in ordered:
+            for model in self.tiers[tier]:
+                if model not in seen:
+                    seen.add(model)
+                    pairs.append((tier, model))
+        if self.default_model not in seen:
+            pairs.append(("default", self.default_model))
+        return pairs
+
+    def stats(self, model: str, task: Optional[str] = None) -> ModelStats:
+        """A model's statistics on one task, or across all tasks when task is None"""
+        with self._lock:
+            return self._stats.setdefault((task, model), ModelStats())
+
+    def degradation(self, task: str, model: str) -> Optional[str]:
+        """Why a model should be skipped for a task, or None if it is healthy"""
+        # Errors are usually the model's or endpoint's, so any task's failures count
+        stats = self.stats(model)
+        if len(stats.recent()) >= self.min_samples and stats.error_rate > self.max_error_rate:
+            return f"error rate {stats.error_rate:.0%}"
+        # Latency depends on the task, so only this task's calls are compared to its SLA
+        task_stats = self.stats(model, task)
+        sla = self.task_slas.get(task)
+        if sla and len(task_stats.recent()) >= self.min_samples and task_stats.p95_latency > sla:
+            return f"p95 {task_stats.p95_latency:.1f}s over {sla:.0f}s SLA"
+        return None
+
+    def call_timeout(self, task: str) -> Optional[float]:
+        """Seconds a single call for the task may take before failing over, if it has an SLA"""
+        sla = self.task_slas.get(task)
+        return sla * self.timeout_factor if sla else None
+
+    def select(self, task: str, exclude: Optional[List[str]] = None) -> RoutingDecision:
+        """Choose the model for a task, skipping excluded and degraded models"""
+        exclude = exclude or []
+        candidates = [(tier, model) for tier, model in self.candidates(task) if model not in exclude]
+        if not candidates:
+            candidates = self.candidates(task)
+
+        skipped = []
+        for tier, model in candidates:
+            problem = self.degradation(task, model)
+            if problem is None:
+                reason = "preferred tier" if not skipped and not exclude else \
+                    "failover: " + ("; ".join(skipped) if skipped else "previous model failed")
+                return self._decision(task, model, tier, reason)
+            skipped.append(f"{model} {problem}")
+
+        # Everything is degraded: use the model with the fewest errors, then lowest latency
+        tier, model = min(candidates, key=lambda c: (self.stats(c[1]).error_rate,
+                                                     self.stats(c[1], task).p95_latency))
+        return self._decision(task, model, tier, "all models degraded; least bad")
+
+    def _decision(self, task: str, model: str, tier: str, reason: str) -> RoutingDecision:
+        return RoutingDecision(task, model, tier, reason,
+                               self.stats(model, task).p95_latency, self.stats(model).error_rate)
+
+    def record(self, task: str, model: str, latency: float, ok: bool) -> None:
+        model_stats, task_stats = self.stats(model), self.stats(model, task)
+        with self._lock:
+            model_stats.record(latency, ok)
+            task_stats.record(latency, ok)
+
+    def max_attempts(self, task: str) -> int:
+        return len(self.candidates(task))
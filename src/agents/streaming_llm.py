@@ -0,0 +1,53 @@
+# src/agents/streaming_llm.py
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import Any, Dict, List, Optional
+from crewai import LLM
+from langchain_openai import ChatOpenAI
+from ..utils.cancellation import CancellationToken
+from ..utils.profiler import ProfileRegistry
+
+# Calls of cancellable runs run here so the agent can stop waiting the moment its run is cancelled
+_call_executor = ThreadPoolExecutor(max_workers=64, thread_name_prefix="llm-call")
+
+class StreamingLLM(LLM):
+    """crewai LLM that makes its calls through a LangChain ChatOpenAI client.
+
+    crewai replaces any `llm` that is not an LLM with one that calls litellm
+    without streaming, on litellm's own HTTP client. Subclassing LLM keeps
+    this one in place, so every call streams through our httpx transports
+    (endpoint pool, usage tracking, cassette recording) and our callbacks
+    (cancellation, itinerary parsing).
+
+    With a token, a call returns as soon as the token is cancelled; the
+    abandoned request stops at its next streamed chunk, when the callbacks
+    see the cancellation, or when the closed client drops its connection.
+    """
+
+    def __init__(self, chat: ChatOpenAI, token: Optional[CancellationToken] = None, poll_interval: float = 0.05):
+        super().__init__(model=chat.model_name, base_url=chat.openai_api_base)
+        self.chat = chat
+        self.token = token
+        self.poll_interval = poll_interval
+
+    def call(self, messages: List[Dict[str, str]], callbacks: List[Any] = []) -> str:
+        # crewai's callbacks are litellm loggers for its own usage metrics; usage is tracked by our transport
+        if self.token is None:
+            return self._invoke(messages)
+        self.token.raise_if_cancelled()
+        future = _call_executor.submit(self._invoke, messages)
+        while True:
+            try:
+                return future.result(timeout=self.poll_interval)
+            except TimeoutError:
+                self.token.raise_if_cancelled()
+            except Exception:
+                self.token.raise_if_cancelled()  # A cancelled stream surfaces as whatever aborted it
+                raise
+
+    def _invoke(self, messages: List[Dict[str, str]]) -> str:
+        run_id = self.token.run_id if self.token is not None else None
+        ProfileRegistry.track_thread(run_id)
+        try:
+            return self.chat.invoke(messages, stop=self.stop).content
+        finally:
+            ProfileRegistry.untrack_thread(run_id)
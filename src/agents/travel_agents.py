@@ -1,58 +1,156 @@
 # src/agents/travel_agents.py
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Type
+import httpx
+from crewai import LLM, Agent
 from langchain_openai import ChatOpenAI
 from .base import TrackedAgent
 from .async_tracked_agent import AsyncTrackedAgent
-from ..config.settings import OPENAI_API_KEY, OPENAI_API_BASE
+from .endpoint_pool import EndpointPool, PooledTransport
+from .llm_callbacks import CancellationCallbackHandler, ItineraryCallbackHandler
+from .streaming_llm import StreamingLLM
+from .usage_tracking import UsageTrackingTransport
+from ..utils.cancellation import CancellationToken
+from .cassette import Cassette, RecordingTransport
+from ..config.settings import (
+    OPENAI_API_KEY, OPENAI_API_BASE, OPENAI_API_BASES, MODEL_NAME, LLM_RECORD_CASSETTE, LLM_HEDGE_PERCENTILE
+)
 
-def create_travel_agents() -> Tuple[TrackedAgent, TrackedAgent]:
-    """Create synchronous travel agents"""
-    llm = ChatOpenAI(
-        model_name="gpt-3.5-turbo",
-        openai_api_key=OPENAI_API_KEY,
-        openai_api_base=OPENAI_API_BASE if OPENAI_API_BASE else None
-    )
+# Role, goal and backstory for every agent, keyed by the name tasks refer to
+AGENT_PROFILES: Dict[str, Dict[str, str]] = {
+    'travel_planner': {
+        'role': 'Travel Planner',
+        'goal': 'Create detailed travel plans based on preferences',
+        'backstory': 'Expert travel planner with years of experience in crafting personalized itineraries'
+    },
+    'local_expert': {
+        'role': 'Local Expert',
+        'goal': 'Enhance travel plans with local insights',
+        'backstory': 'Local expert with deep knowledge of destinations and hidden gems'
+    },
+    'budget_analyst': {
+        'role': 'Budget Analyst',
+        'goal': 'Estimate realistic costs for a travel plan and keep it within budget',
+        'backstory': 'Seasoned travel accountant who knows typical prices for lodging, food and activities'
+    },
+    'food_guide': {
+        'role': 'Food Guide',
+        'goal': 'Recommend places to eat that fit the itinerary and budget',
+        'backstory': 'Food writer who has eaten their way through markets, street stalls and restaurants worldwide'
+    },
+    'transport_planner': {
+        'role': 'Transport Planner',
+        'goal': 'Plan how to get around between the places in a travel plan',
+        'backstory': 'Logistics expert familiar with public transit, passes and transfers in major destinations'
+    }
+}
 
-    travel_planner = TrackedAgent(
-        role='Travel Planner',
-        goal='Create detailed travel plans based on preferences',
-        backstory='Expert travel planner with years of experience in crafting personalized itineraries',
-        verbose=True,
-        llm=llm
-    )
+SPECIALISTS = ('budget_analyst', 'food_guide', 'transport_planner')
+
+# Agents whose output is a day-by-day itinerary, ranked so later versions of a day win
+ITINERARY_AGENTS = {'travel_planner': 0, 'local_expert': 1}
+
+def _endpoint_pool() -> Optional[EndpointPool]:
+    if not OPENAI_API_BASES:
+        return None
+    return EndpointPool.get_instance(OPENAI_API_BASES, api_key=OPENAI_API_KEY,
+                                     hedge_percentile=LLM_HEDGE_PERCENTILE)
+
+def _api_base(pool: Optional[EndpointPool] = None) -> Optional[str]:
+    if pool:
+        return pool.base_url
+    return OPENAI_API_BASE if OPENAI_API_BASE else None
+
+def _create_http_client(token: Optional[CancellationToken] = None,
+                        pool: Optional[EndpointPool] = None) -> httpx.Client:
+    # Usage is recorded on every client so cached prompt tokens show up in the metrics,
+    # and against the run for token budgets
+    transport = UsageTrackingTransport(PooledTransport(pool) if pool else None,
+                                       token.stats if token is not None else None)
+    if LLM_RECORD_CASSETTE:
+        transport = RecordingTransport(Cassette(LLM_RECORD_CASSETTE), transport)
+    return httpx.Client(transport=transport)
 
-    local_expert = TrackedAgent(
-        role='Local Expert',
-        goal='Enhance travel plans with local insights',
-        backstory='Local expert with deep knowledge of destinations and hidden gems',
-        verbose=True,
-        llm=llm
+def _create_llm(model: str = MODEL_NAME, token: Optional[CancellationToken] = None,
+                callbacks: Optional[List] = None, pool: Optional[EndpointPool] = None) -> StreamingLLM:
+    # PooledTransport picks the endpoint of each request, hedges slow ones and ejects bad endpoints
+    pool = pool or _endpoint_pool()
+    llm_kwargs = {}
+    if token is not None:
+        # A per-run HTTP client lets cancellation abort requests that are still in flight
+        http_client = _create_http_client(token, pool)
+        token.on_cancel(http_client.close)
+        llm_kwargs.update(
+            http_client=http_client,
+            streaming=True,
+            stream_usage=True,
+            callbacks=[CancellationCallbackHandler(token)] + (callbacks or [])
+        )
+    else:
+        llm_kwargs['http_client'] = _create_http_client(pool=pool)
+
+    chat = ChatOpenAI(
+        model_name=model,
+        openai_api_key=pool.api_key if pool and pool.api_key else OPENAI_API_KEY,
+        openai_api_base=_api_base(pool),
+        **llm_kwargs
     )
+    return StreamingLLM(chat, token)
+
+def _create_agent(agent_cls: Type[Agent], name: str, llm: LLM,
+                  token: Optional[CancellationToken] = None) -> Agent:
+    if token is not None and issubclass(agent_cls, AsyncTrackedAgent):
+        # Tag activities with the run so they reach only that run's session
+        return agent_cls(**AGENT_PROFILES[name], verbose=True, llm=llm, run_id=token.run_id)
+    return agent_cls(**AGENT_PROFILES[name], verbose=True, llm=llm)
 
-    return travel_planner, local_expert
+def create_travel_agents() -> Tuple[TrackedAgent, TrackedAgent]:
+    """Create synchronous travel agents"""
+    llm = _create_llm()
+    return (
+        _create_agent(TrackedAgent, 'travel_planner', llm),
+        _create_agent(TrackedAgent, 'local_expert', llm)
+    )
 
 def create_async_travel_agents() -> Tuple[AsyncTrackedAgent, AsyncTrackedAgent]:
     """Create asynchronous travel agents"""
-    llm = ChatOpenAI(
-        model_name="gpt-3.5-turbo",
-        openai_api_key=OPENAI_API_KEY,
-        openai_api_base=OPENAI_API_BASE if OPENAI_API_BASE else None
+    llm = _create_llm()
+    return (
+        _create_agent(AsyncTrackedAgent, 'travel_planner', llm),
+        _create_agent(AsyncTrackedAgent, 'local_expert', llm)
     )
 
-    travel_planner = AsyncTrackedAgent(
-        role='Travel Planner',
-        goal='Create detailed travel plans based on preferences',
-        backstory='Expert travel planner with years of experience in crafting personalized itineraries',
-        verbose=True,
-        llm=llm
-    )
+def _itinerary_callbacks(name: str, token: Optional[CancellationToken]) -> List:
+    if token is None or name not in ITINERARY_AGENTS:
+        return []
+    role = AGENT_PROFILES[name]['role']
+    return [ItineraryCallbackHandler(token.run_id, role, ITINERARY_AGENTS[name])]
 
-    local_expert = AsyncTrackedAgent(
-        role='Local Expert',
-        goal='Enhance travel plans with local insights',
-        backstory='Local expert with deep knowledge of destinations and hidden gems',
-        verbose=True,
-        llm=llm
-    )
+def create_agent(name: str, model: str = MODEL_NAME, async_mode: bool = True,
+                 token: Optional[CancellationToken] = None, pool: Optional[EndpointPool] = None) -> Agent:
+    """Create a single agent by name, bound to the given model and, optionally, endpoint pool"""
+    agent_cls = AsyncTrackedAgent if async_mode else TrackedAgent
+    llm = _create_llm(model, token, _itinerary_callbacks(name, token), pool)
+    return _create_agent(agent_cls, name, llm, token)
+
+def create_travel_crew(async_mode: bool = True,
+                       token: Optional[CancellationToken] = None,
+                       models: Optional[Dict[str, str]] = None) -> Dict[str, Agent]:
+    """Create the planner, the local expert and all specialists, keyed by name.
 
-    return travel_planner, local_expert
\ No newline at end of file
+    `models` maps agent names to model names. Agents on the same model share an
+    LLM client, except itinerary agents, whose streams are parsed separately.
+    """
+    agent_cls = AsyncTrackedAgent if async_mode else TrackedAgent
+    models = models or {}
+    llms: Dict[str, LLM] = {}
+    crew = {}
+    for name in AGENT_PROFILES:
+        model = models.get(name, MODEL_NAME)
+        callbacks = _itinerary_callbacks(name, token)
+        if callbacks:
+            crew[name] = _create_agent(agent_cls, name, _create_llm(model, token, callbacks), token)
+            continue
+        if model not in llms:
+            llms[model] = _create_llm(model, token)
+        crew[name] = _create_agent(agent_cls, name, llms[model], token)
+    return crew
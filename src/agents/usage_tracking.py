@@ -0,0 +1,136 @@
+# src/agents/usage_tracking.py
+import json
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional
+import httpx
+from ..utils.cancellation import RunStats
+from ..utils.stats import percentile
+
+class PromptCacheStats:
+    """Process-wide prompt token usage as reported by the backend, including cached prefixes"""
+    _lock = threading.Lock()
+    requests = 0
+    cache_hits = 0
+    prompt_tokens = 0
+    cached_tokens = 0
+    completion_tokens = 0
+    _ttfb: Dict[bool, list] = {True: [], False: []}
+
+    @classmethod
+    def record(cls, usage: Dict[str, Any], ttfb: Optional[float] = None) -> None:
+        cached = (usage.get('prompt_tokens_details') or {}).get('cached_tokens') or 0
+        with cls._lock:
+            cls.requests += 1
+            cls.cache_hits += int(cached > 0)
+            cls.prompt_tokens += usage.get('prompt_tokens') or 0
+            cls.cached_tokens += cached
+            cls.completion_tokens += usage.get('completion_tokens') or 0
+            if ttfb is not None:
+                samples = cls._ttfb[cached > 0]
+                samples.append(ttfb)
+                del samples[:-1000]
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._lock:
+            cls.requests = cls.cache_hits = 0
+            cls.prompt_tokens = cls.cached_tokens = cls.completion_tokens = 0
+            cls._ttfb = {True: [], False: []}
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, float]:
+        with cls._lock:
+            return {
+                "requests": cls.requests,
+                "cache_hits": cls.cache_hits,
+                "prompt_tokens": cls.prompt_tokens,
+                "cached_tokens": cls.cached_tokens,
+                "completion_tokens": cls.completion_tokens,
+                "cached_token_ratio": round(cls.cached_tokens / cls.prompt_tokens, 3) if cls.prompt_tokens else 0.0,
+                "ttfb_p50_cached": round(percentile(cls._ttfb[True], 50), 3),
+                "ttfb_p50_uncached": round(percentile(cls._ttfb[False], 50), 3)
+            }
+
+class _UsageStream(httpx.SyncByteStream):
+    """Passes a response body through while looking for the usage object.
+
+    Server-sent events are scanned line by line, since usage arrives in the
+    last chunk; a JSON body is parsed once it has been read.
+    """
+
+    def __init__(self, stream: httpx.SyncByteStream, streamed: bool, ttfb: float,
+                 run_stats: Optional[RunStats] = None):
+        self._stream = stream
+        self._streamed = streamed
+        self._ttfb = ttfb
+        self._run_stats = run_stats
+        self._buffer = b""
+        self._recorded = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._stream:
+            self._buffer += chunk
+            if self._streamed:
+                *lines, self._buffer = self._buffer.split(b"\n")
+                for line in lines:
+                    self._scan_event(line)
+            yield chunk
+
+    def _scan_event(self, line: bytes) -> None:
+        if not line.startswith(b"data:") or b'"usage"' not in line:
+            return
+        try:
+            self._record(json.loads(line[5:]).get('usage'))
+        except ValueError:
+            pass
+
+    def _record(self, usage: Optional[Dict[str, Any]]) -> None:
+        if usage and not self._recorded:
+            self._recorded = True
+            PromptCacheStats.record(usage, self._ttfb)
+            if self._run_stats is not None:
+                self._run_stats.prompt_tokens += usage.get('prompt_tokens') or 0
+                self._run_stats.completion_tokens += usage.get('completion_tokens') or 0
+
+    def close(self) -> None:
+        try:
+            if self._streamed:
+                self._scan_event(self._buffer)
+            elif self._buffer:
+                try:
+                    self._record(json.loads(self._buffer).get('usage'))
+                except (ValueError, AttributeError):
+                    pass
+            self._buffer = b""
+        finally:
+            self._stream.close()
+
+class UsageTrackingTransport(httpx.BaseTransport):
+    """httpx transport that records the token usage of chat completion responses.
+
+    Usage is added to the process-wide PromptCacheStats and, when given, to
+    the stats of the run the client belongs to.
+    """
+
+    def __init__(self, transport: Optional[httpx.BaseTransport] = None,
+                 run_stats: Optional[RunStats] = None):
+        self._transport = transport or httpx.HTTPTransport()
+        self._run_stats = run_stats
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.time()
+        response = self._transport.handle_request(request)
+        if not request.url.path.endswith('/chat/completions') or response.status_code >= 400:
+            return response
+        streamed = 'text/event-stream' in response.headers.get('content-type', '')
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_UsageStream(response.stream, streamed, time.time() - started, self._run_stats),
+            extensions=response.extensions,
+            request=request
+        )
+
+    def close(self) -> None:
+        self._transport.close()
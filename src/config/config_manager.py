@@ -1,16 +1,35 @@
 # src/config/config_manager.py
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 import os
+from .settings import MODEL_NAME
 
 @dataclass
 class AppConfig:
     """Application configuration class"""
     openai_api_key: str
     openai_api_base: Optional[str]
-    model_name: str = "gpt-3.5-turbo"
+    model_name: str = MODEL_NAME
     debug_mode: bool = False
+    max_parallel_tasks: int = 4
+    max_task_concurrency: int = 8
+    comparison_max_parallel_tasks: int = 12
+    run_deadline_seconds: Optional[float] = None
+    max_concurrent_runs: int = 4
+    max_queued_runs_per_user: int = 5
+    max_running_runs_per_user: int = 1
+    plan_cache_ttl_seconds: float = 6 * 3600
+    warm_token_budget_per_hour: int = 0
+    peak_hours: Tuple[int, int] = (9, 21)
+    speculative_planning: bool = False
+    speculative_debounce_seconds: float = 1.5
+    max_speculative_tokens: int = 3000
+    speculative_token_budget_per_hour: int = 20000
+    # Ordered model tiers, e.g. {"fast": ["gpt-4o-mini"], "strong": ["gpt-4o"]}; empty means model_name only
+    model_tiers: Dict[str, List[str]] = field(default_factory=dict)
+    task_model_tiers: Dict[str, str] = field(default_factory=dict)
+    task_latency_slas: Dict[str, float] = field(default_factory=dict)
 
 class ConfigurationManager:
     @staticmethod
@@ -27,10 +46,45 @@ class ConfigurationManager:
         return AppConfig(
             openai_api_key=os.getenv('OPENAI_API_KEY'),
             openai_api_base=os.getenv('OPENAI_API_BASE'),
-            model_name=os.getenv('MODEL_NAME', 'gpt-3.5-turbo'),
-            debug_mode=os.getenv('DEBUG_MODE', 'False').lower() == 'true'
+            model_name=MODEL_NAME,
+            debug_mode=os.getenv('DEBUG_MODE', 'False').lower() == 'true',
+            max_parallel_tasks=int(os.getenv('MAX_PARALLEL_TASKS', '4')),
+            max_task_concurrency=int(os.getenv('MAX_TASK_CONCURRENCY', '8')),
+            comparison_max_parallel_tasks=int(os.getenv('COMPARISON_MAX_PARALLEL_TASKS', '12')),
+            run_deadline_seconds=float(os.getenv('RUN_DEADLINE_SECONDS')) if os.getenv('RUN_DEADLINE_SECONDS') else None,
+            max_concurrent_runs=int(os.getenv('MAX_CONCURRENT_RUNS', '4')),
+            max_queued_runs_per_user=int(os.getenv('MAX_QUEUED_RUNS_PER_USER', '5')),
+            max_running_runs_per_user=int(os.getenv('MAX_RUNNING_RUNS_PER_USER', '1')),
+            plan_cache_ttl_seconds=float(os.getenv('PLAN_CACHE_TTL_SECONDS', str(6 * 3600))),
+            warm_token_budget_per_hour=int(os.getenv('WARM_TOKEN_BUDGET_PER_HOUR', '0')),
+            peak_hours=tuple(int(hour) for hour in os.getenv('PEAK_HOURS', '9-21').split('-', 1)),
+            speculative_planning=os.getenv('SPECULATIVE_PLANNING', 'False').lower() == 'true',
+            speculative_debounce_seconds=float(os.getenv('SPECULATIVE_DEBOUNCE_SECONDS', '1.5')),
+            max_speculative_tokens=int(os.getenv('MAX_SPECULATIVE_TOKENS', '3000')),
+            speculative_token_budget_per_hour=int(os.getenv('SPECULATIVE_TOKEN_BUDGET_PER_HOUR', '20000')),
+            model_tiers={
+                tier: models.split('|')
+                for tier, models in ConfigurationManager.parse_mapping(os.getenv('MODEL_TIERS', '')).items()
+            },
+            task_model_tiers=ConfigurationManager.parse_mapping(
+                os.getenv('TASK_MODEL_TIERS', 'travel_planner=fast,local_expert=strong')
+            ),
+            task_latency_slas={
+                task: float(seconds)
+                for task, seconds in ConfigurationManager.parse_mapping(os.getenv('TASK_LATENCY_SLAS', '')).items()
+            }
         )
 
+    @staticmethod
+    def parse_mapping(value: str) -> Dict[str, str]:
+        """Parse 'key=value,key=value' environment variables"""
+        mapping = {}
+        for item in value.split(','):
+            if '=' in item:
+                key, val = item.split('=', 1)
+                mapping[key.strip()] = val.strip()
+        return mapping
+
     @staticmethod
     def validate_config(config: AppConfig) -> bool:
         """Validate configuration"""
@@ -6,4 +6,13 @@ load_dotenv()
 
 # Configure OpenAI API
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-OPENAI_API_BASE = os.getenv('OPENAI_API_BASE')
\ No newline at end of file
+OPENAI_API_BASE = os.getenv('OPENAI_API_BASE')
+MODEL_NAME = os.getenv('MODEL_NAME', 'gpt-3.5-turbo')
+
+# Several comma-separated OpenAI-compatible base URLs to load balance across
+OPENAI_API_BASES = [url.strip() for url in os.getenv('OPENAI_API_BASES', '').split(',') if url.strip()]
+# Duplicate requests still waiting past this latency percentile to a second endpoint
+LLM_HEDGE_PERCENTILE = float(os.getenv('LLM_HEDGE_PERCENTILE')) if os.getenv('LLM_HEDGE_PERCENTILE') else None
+
+# Record LLM exchanges to this cassette file (see src/loadtest)
+LLM_RECORD_CASSETTE = os.getenv('LLM_RECORD_CASSETTE')
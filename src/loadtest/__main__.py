@@ -0,0 +1,146 @@
+# src/loadtest/__main__.py
+"""Record/replay load generator.
+
+Record real exchanges by running the app with LLM_RECORD_CASSETTE set:
+
+    LLM_RECORD_CASSETTE=cassettes/travel.jsonl streamlit run app.py
+
+Serve a cassette as a local OpenAI-compatible endpoint:
+
+    python -m src.loadtest serve cassettes/travel.jsonl --port 8900 --time-scale 0.5
+
+Drive simulated Streamlit sessions against a replayed cassette:
+
+    python -m src.loadtest run cassettes/travel.jsonl --levels 1 4 16 --sessions 20
+
+Compare queueing disciplines under a synthetic noisy neighbour:
+
+    python -m src.loadtest fairness
+
+Compare load balancing and hedged requests across several stub endpoints:
+
+    python -m src.loadtest hedging
+
+Compare prompt layouts against a stub server with prefix caching:
+
+    python -m src.loadtest prefix-cache
+"""
+import argparse
+import os
+import time
+from ..agents.cassette import Cassette
+from .report import format_table, write_json
+from .stub_server import ReplayStubServer
+
+def _serve(args) -> None:
+    server = ReplayStubServer(Cassette(args.cassette).load(), port=args.port,
+                              time_scale=args.time_scale).start()
+    print(f"Replaying {args.cassette} at {server.base_url} (time scale {args.time_scale})")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+def _run(args) -> None:
+    server = ReplayStubServer(Cassette(args.cassette).load(), time_scale=args.time_scale).start()
+    # Point the app at the stub before anything imports src.config.settings
+    os.environ['OPENAI_API_BASE'] = server.base_url
+    os.environ.setdefault('OPENAI_API_KEY', 'stub-key')
+    os.environ.pop('LLM_RECORD_CASSETTE', None)
+
+    from .simulator import LoadGenerator, SessionSimulator
+    simulator = SessionSimulator(app_path=args.app, timeout=args.timeout, seed=args.seed)
+    generator = LoadGenerator(simulator, sessions_per_level=args.sessions,
+                              upstream_in_flight=lambda: server.in_flight)
+    try:
+        reports = generator.run(args.levels)
+    finally:
+        server.stop()
+
+    print(format_table(reports))
+    if args.output:
+        write_json(args.output, reports)
+        print(f"Report written to {args.output}")
+
+def _fairness(args) -> None:
+    from .fairness import format_fairness, run_noisy_neighbour
+    reports = [
+        run_noisy_neighbour(fair=fair, workers=args.workers, noisy_jobs=args.noisy_jobs,
+                            quiet_users=args.quiet_users, duration=args.duration)
+        for fair in (False, True)
+    ]
+    print(format_fairness(reports))
+    if args.output:
+        write_json(args.output, reports)
+
+def _hedging(args) -> None:
+    from .hedging import format_hedging, run_hedging
+    reports = run_hedging(requests=args.requests, endpoints=args.endpoints, concurrency=args.concurrency,
+                          stall_probability=args.stall_probability, stall_seconds=args.stall_seconds,
+                          hedge_percentile=args.hedge_percentile)
+    print(format_hedging(reports))
+    if args.output:
+        write_json(args.output, reports)
+
+def _prefix_cache(args) -> None:
+    from .prefix_caching import format_prefix_caching, run_prefix_caching
+    reports = run_prefix_caching(runs=args.runs, concurrency=args.concurrency,
+                                 cached_price_ratio=args.cached_price_ratio)
+    print(format_prefix_caching(reports))
+    if args.output:
+        write_json(args.output, reports)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m src.loadtest", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve = subparsers.add_parser("serve", help="Replay a cassette as an OpenAI-compatible server")
+    serve.add_argument("cassette")
+    serve.add_argument("--port", type=int, default=8900)
+    serve.add_argument("--time-scale", type=float, default=1.0)
+    serve.set_defaults(func=_serve)
+
+    run = subparsers.add_parser("run", help="Drive simulated sessions against a replayed cassette")
+    run.add_argument("cassette")
+    run.add_argument("--app", default="app.py")
+    run.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16])
+    run.add_argument("--sessions", type=int, default=20, help="Sessions per concurrency level")
+    run.add_argument("--time-scale", type=float, default=1.0)
+    run.add_argument("--timeout", type=float, default=300.0)
+    run.add_argument("--seed", type=int, default=None)
+    run.add_argument("--output", help="Write the report as JSON to this path")
+    run.set_defaults(func=_run)
+
+    fairness = subparsers.add_parser("fairness", help="Noisy-neighbour test of the run scheduler")
+    fairness.add_argument("--workers", type=int, default=4)
+    fairness.add_argument("--noisy-jobs", type=int, default=100)
+    fairness.add_argument("--quiet-users", type=int, default=6)
+    fairness.add_argument("--duration", type=float, default=4.0)
+    fairness.add_argument("--output", help="Write the report as JSON to this path")
+    fairness.set_defaults(func=_fairness)
+
+    hedging = subparsers.add_parser("hedging", help="Tail latency of balanced and hedged requests")
+    hedging.add_argument("--requests", type=int, default=1000)
+    hedging.add_argument("--endpoints", type=int, default=3)
+    hedging.add_argument("--concurrency", type=int, default=8)
+    hedging.add_argument("--stall-probability", type=float, default=0.03)
+    hedging.add_argument("--stall-seconds", type=float, default=1.0)
+    hedging.add_argument("--hedge-percentile", type=float, default=90.0)
+    hedging.add_argument("--output", help="Write the report as JSON to this path")
+    hedging.set_defaults(func=_hedging)
+
+    prefix = subparsers.add_parser("prefix-cache", help="Prompt prefix reuse of the old and new prompt layouts")
+    prefix.add_argument("--runs", type=int, default=60, help="Plan runs per layout, five agent calls each")
+    prefix.add_argument("--concurrency", type=int, default=4)
+    prefix.add_argument("--cached-price-ratio", type=float, default=0.5,
+                        help="Price of a cached prompt token relative to an uncached one")
+    prefix.add_argument("--output", help="Write the report as JSON to this path")
+    prefix.set_defaults(func=_prefix_cache)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# src/loadtest/fairness.py
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List
+from .report import latency_summary
+from ..tasks.fair_scheduler import FairScheduler, Job
+from ..utils.cancellation import CancellationToken
+
+@dataclass
+class FairnessReport:
+    """Latency and fairness of one queueing discipline under a noisy neighbour"""
+    discipline: str
+    quiet_latency: Dict[str, float]
+    noisy_latency: Dict[str, float]
+    jain_index: float
+
+def jain_index(values: List[float]) -> float:
+    """Jain's fairness index: 1.0 when all values are equal, 1/n when one flow gets everything"""
+    if not values or not any(values):
+        return 0.0
+    return sum(values) ** 2 / (len(values) * sum(v * v for v in values))
+
+def run_noisy_neighbour(fair: bool, workers: int = 4, noisy_jobs: int = 100, quiet_users: int = 6,
+                        quiet_interval: float = 0.5, duration: float = 4.0,
+                        mean_service: float = 0.2, seed: int = 7) -> FairnessReport:
+    """One user scripts a burst of submissions while quiet users submit steadily.
+
+    With `fair=False` every job goes into one shared flow, which is the
+    first-come-first-served behaviour of one thread per submit with a fixed
+    pool. Quotas are lifted so only the queueing discipline differs.
+    """
+    rng = random.Random(seed)
+    scheduler = FairScheduler(workers=workers, max_queued_per_flow=10_000, max_running_per_flow=workers)
+    jobs: List[Job] = []
+    lock = threading.Lock()
+
+    def submit(user: str) -> None:
+        service = rng.expovariate(1 / mean_service)
+        with lock:
+            jobs.append(scheduler.submit(
+                flow_id=user if fair else "shared",
+                fn=lambda: time.sleep(service),
+                token=CancellationToken(),
+                job_id=f"{user}-{len(jobs)}"
+            ))
+
+    started = time.time()
+    for _ in range(noisy_jobs):
+        submit("noisy")
+    while time.time() - started < duration:
+        for i in range(quiet_users):
+            submit(f"quiet-{i}")
+        time.sleep(quiet_interval * rng.uniform(0.8, 1.2))
+
+    while any(job.state != "done" for job in jobs):
+        time.sleep(0.05)
+
+    def user_of(job: Job) -> str:
+        return job.job_id.rsplit("-", 1)[0]
+
+    def latencies(predicate) -> List[float]:
+        return [j.finished_at - j.submitted_at for j in jobs if predicate(user_of(j))]
+
+    # Share of each user's demand served within the contention window
+    window_end = started + duration
+    served = []
+    for user in {user_of(j) for j in jobs}:
+        submitted = [j for j in jobs if user_of(j) == user and j.submitted_at <= window_end]
+        if submitted:
+            served.append(sum(1 for j in submitted if j.finished_at <= window_end) / len(submitted))
+
+    return FairnessReport(
+        discipline="weighted fair queueing" if fair else "first come, first served",
+        quiet_latency=latency_summary(latencies(lambda u: u != "noisy")),
+        noisy_latency=latency_summary(latencies(lambda u: u == "noisy")),
+        jain_index=round(jain_index(served), 3)
+    )
+
+def format_fairness(reports: List[FairnessReport]) -> str:
+    header = f"{'discipline':<26} {'quiet p50':>10} {'quiet p95':>10} {'noisy p95':>10} {'jain':>6}"
+    lines = [header, "-" * len(header)]
+    for r in reports:
+        lines.append(
+            f"{r.discipline:<26} {r.quiet_latency['p50']:>10.2f} {r.quiet_latency['p95']:>10.2f} "
+            f"{r.noisy_latency['p95']:>10.2f} {r.jain_index:>6.3f}"
+        )
+    return "\n".join(lines)
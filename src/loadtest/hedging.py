@@ -0,0 +1,116 @@
+# src/loadtest/hedging.py
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List
+from crewai import Task
+from .report import latency_summary
+from .stub_server import ReplayStubServer
+from ..agents.async_tracked_agent import AsyncActivityEmitter
+from ..agents.endpoint_pool import EndpointPool
+from ..agents.travel_agents import create_agent
+from ..utils.cancellation import CancellationToken
+
+@dataclass
+class HedgingReport:
+    """Request latency through one client configuration against the stub rig"""
+    strategy: str
+    requests: int
+    errors: int
+    latency: Dict[str, float]
+    hedged: int
+    hedge_wins: int
+    ejections: int
+    upstream_requests: int
+
+def _stall(rng: random.Random, lock: threading.Lock, probability: float, seconds: float):
+    def delay() -> float:
+        with lock:
+            return seconds if rng.random() < probability else 0.0
+    return delay
+
+def run_hedging(requests: int = 1000, endpoints: int = 3, concurrency: int = 8, time_scale: float = 0.1,
+                stall_probability: float = 0.03, stall_seconds: float = 1.0,
+                degraded_stall_probability: float = 0.3, hedge_percentile: float = 90.0,
+                seed: int = 7) -> List[HedgingReport]:
+    """Run the same planner tasks through a single endpoint, a balanced pool and a hedged pool.
+
+    Each request is a planner agent built by the app's agent factory doing
+    one task, so calls take the path the app's do: crewai, StreamingLLM and
+    the pooled httpx transport. Every stub occasionally stalls before
+    answering, like a backend hitting a GC pause or a long batch; the last
+    stub is degraded and stalls far more often, so the pool should eject it.
+    """
+    strategies = [("single endpoint", None), ("least outstanding", None),
+                  (f"hedged at p{hedge_percentile:g}", hedge_percentile)]
+    reports = []
+    for strategy, percentile in strategies:
+        rng, lock = random.Random(seed), threading.Lock()
+        servers = [
+            ReplayStubServer([], time_scale=time_scale, extra_delay=_stall(
+                rng, lock, degraded_stall_probability if i == endpoints - 1 else stall_probability,
+                stall_seconds
+            )).start()
+            for i in range(endpoints)
+        ]
+        # A pool of one healthy backend stands for every client pinned to one URL
+        urls = [servers[0].base_url] if strategy == "single endpoint" else [s.base_url for s in servers]
+        pool = EndpointPool(urls, api_key="stub", health_interval=0, hedge_percentile=percentile)
+
+        latencies: List[float] = []
+        errors = 0
+        workers = threading.local()
+
+        def send(_) -> None:
+            nonlocal errors
+            if not hasattr(workers, "agent"):
+                # Building an agent costs more CPU than a stub call, so each worker reuses one
+                workers.token = CancellationToken()
+                workers.agent = create_agent('travel_planner', 'stub', token=workers.token, pool=pool)
+                workers.agent.verbose = False
+            agent = workers.agent
+            task = Task(description="Plan a trip", expected_output="A day-by-day itinerary", agent=agent)
+            started = time.time()
+            try:
+                agent.execute_task(task)
+                with lock:
+                    latencies.append(time.time() - started)
+            except Exception:
+                with lock:
+                    errors += 1
+            finally:
+                AsyncActivityEmitter.discard_run(workers.token.run_id)
+
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                list(executor.map(send, range(requests)))
+        finally:
+            for server in servers:
+                server.stop()
+
+        snapshot = pool.snapshot()
+        reports.append(HedgingReport(
+            strategy=strategy,
+            requests=requests,
+            errors=errors,
+            latency=latency_summary(latencies),
+            hedged=snapshot["hedged"],
+            hedge_wins=snapshot["hedge_wins"],
+            ejections=sum(e["ejections"] for e in snapshot["endpoints"]),
+            upstream_requests=sum(s.requests_served for s in servers)
+        ))
+    return reports
+
+def format_hedging(reports: List[HedgingReport]) -> str:
+    header = (f"{'strategy':<18} {'p50':>6} {'p95':>6} {'p99':>6} {'max':>6} {'err':>4} "
+              f"{'hedged':>7} {'wins':>5} {'eject':>6} {'upstrm':>7}")
+    lines = [header, "-" * len(header)]
+    for r in reports:
+        lines.append(
+            f"{r.strategy:<18} {r.latency['p50']:>6.2f} {r.latency['p95']:>6.2f} {r.latency['p99']:>6.2f} "
+            f"{r.latency['max']:>6.2f} {r.errors:>4} {r.hedged:>7} {r.hedge_wins:>5} {r.ejections:>6} "
+            f"{r.upstream_requests:>7}"
+        )
+    return "\n".join(lines)
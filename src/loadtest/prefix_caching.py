@@ -0,0 +1,145 @@
+# src/loadtest/prefix_caching.py
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import httpx
+from .report import latency_summary
+from .stub_server import PrefixCacheSimulator, ReplayStubServer
+from ..agents.travel_agents import AGENT_PROFILES
+from ..agents.usage_tracking import PromptCacheStats, UsageTrackingTransport
+from ..tasks.prompt_layout import TASK_INSTRUCTIONS, trip_request
+
+DESTINATIONS = ["Lisbon", "Kyoto", "Hanoi", "Mexico City", "Reykjavik", "Cape Town", "Istanbul", "Vancouver"]
+INTERESTS = ["Culture", "Nature", "Food", "Adventure"]
+BUDGETS = ["Budget", "Moderate", "Luxury"]
+
+@dataclass
+class PrefixCacheReport:
+    """Prompt reuse, latency and relative prompt cost of one prompt layout"""
+    layout: str
+    requests: int
+    prompt_tokens: int
+    uncached_tokens: int
+    cached_token_ratio: float
+    latency: Dict[str, float]
+    relative_prompt_cost: float
+
+def _legacy_task(name: str, destination: str, duration: int, budget: str, interests: List[str]) -> List[str]:
+    """Descriptions as they were before the layout change, with the request interleaved"""
+    return {
+        'travel_planner': [f"Create a {duration}-day {budget} travel plan for {destination} focusing on "
+                           f"{', '.join(interests)}", "A detailed day-by-day travel itinerary"],
+        'local_expert': ["Review and enhance the travel plan with local insights",
+                         "Enhanced plan with local recommendations and their detailed address/contact"],
+        'budget_analyst': [f"Estimate the cost of each day of the travel plan for a {budget} budget",
+                           "A per-day and total cost breakdown with money-saving tips"],
+        'food_guide': [f"Recommend where to eat in {destination} for each day of the travel plan",
+                       "Breakfast, lunch and dinner suggestions per day with addresses and price range"],
+        'transport_planner': [f"Plan transport between the places in the travel plan for {destination}",
+                              "Per-day transport directions, passes to buy and estimated travel times"]
+    }[name]
+
+def crew_messages(agent: str, description: str, expected_output: str, context: Optional[str]) -> List[Dict]:
+    """Chat messages in the shape CrewAI builds for an agent without tools"""
+    profile = AGENT_PROFILES[agent]
+    system = (
+        f"You are {profile['role']}. {profile['backstory']}\nYour personal goal is: {profile['goal']}\n"
+        "To give my best complete final answer to the task use the exact following format:\n\n"
+        "Thought: I now can give a great answer\nFinal Answer: Your final answer must be the great and "
+        "the most complete as possible, it must be outcome described.\n\nI MUST use these formats, my job "
+        "depends on it!"
+    )
+    user = (
+        f"\nCurrent Task: {description}\n\nThis is the expect criteria for your final answer: {expected_output}\n"
+        "you MUST return the actual complete content as the final answer, not a summary."
+    )
+    if context:
+        user += f"\n\nThis is the context you're working with:\n{context}"
+    user += ("\n\nBegin! This is VERY important to you, use the tools available and give your best Final "
+             "Answer, your job depends on it!\n\nThought:")
+    return [{"role": "system", "content": system}, {"role": "user", "content": user}]
+
+def plan_requests(rng: random.Random, layout: str) -> List[List[Dict]]:
+    """The five agent calls of one plan run, in the given layout"""
+    destination = rng.choice(DESTINATIONS)
+    duration = rng.randint(2, 7)
+    budget = rng.choice(BUDGETS)
+    interests = rng.sample(INTERESTS, rng.randint(1, 3))
+    plan = "\n".join(
+        f"Day {day}: {destination} {rng.choice(['old town', 'markets', 'museums', 'coast', 'parks'])}\n"
+        f"Morning at the {rng.choice(['harbour', 'castle', 'cathedral', 'gardens'])}, lunch nearby, "
+        f"afternoon exploring, dinner at a local favourite (${rng.randint(20, 90)})."
+        for day in range(1, duration + 1)
+    )
+    calls = []
+    for name in TASK_INSTRUCTIONS:
+        if layout == "interleaved":
+            description, expected_output = _legacy_task(name, destination, duration, budget, interests)
+            context = None if name == 'travel_planner' else f"Output of Travel Planner:\n{plan}"
+        else:
+            description, expected_output = TASK_INSTRUCTIONS[name]
+            # As DAGScheduler.build_context joins them: the task's request fields, then the plan
+            parts = [trip_request(destination, duration, budget, interests, task=name)]
+            if name != 'travel_planner':
+                parts.append(f"Output of Travel Planner:\n{plan}")
+            context = "\n\n".join(part for part in parts if part)
+        calls.append(crew_messages(name, description, expected_output, context))
+    return calls
+
+def run_prefix_caching(runs: int = 60, concurrency: int = 4, time_scale: float = 0.1,
+                       cached_price_ratio: float = 0.5, seed: int = 7) -> List[PrefixCacheReport]:
+    """Replay the same plan runs in both layouts against a stub with prefix caching"""
+    reports = []
+    for layout in ("interleaved", "static first"):
+        rng = random.Random(seed)
+        runs_calls = [plan_requests(rng, layout) for _ in range(runs)]
+        server = ReplayStubServer([], time_scale=time_scale, prefix_cache=PrefixCacheSimulator()).start()
+        client = httpx.Client(base_url=server.base_url, transport=UsageTrackingTransport(), timeout=30.0)
+        PromptCacheStats.reset()
+        latencies: List[float] = []
+        lock = threading.Lock()
+
+        def run_plan(calls: List[List[Dict]]) -> None:
+            for messages in calls:
+                started = time.time()
+                response = client.post("/chat/completions", json={"model": "stub", "messages": messages})
+                response.read()
+                response.close()
+                with lock:
+                    latencies.append(time.time() - started)
+
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                list(executor.map(run_plan, runs_calls))
+        finally:
+            client.close()
+            server.stop()
+
+        stats = PromptCacheStats.snapshot()
+        uncached = stats["prompt_tokens"] - stats["cached_tokens"]
+        reports.append(PrefixCacheReport(
+            layout=layout,
+            requests=stats["requests"],
+            prompt_tokens=stats["prompt_tokens"],
+            uncached_tokens=uncached,
+            cached_token_ratio=stats["cached_token_ratio"],
+            latency=latency_summary(latencies),
+            relative_prompt_cost=round(
+                (uncached + cached_price_ratio * stats["cached_tokens"]) / stats["prompt_tokens"], 3
+            ) if stats["prompt_tokens"] else 0.0
+        ))
+    return reports
+
+def format_prefix_caching(reports: List[PrefixCacheReport]) -> str:
+    header = (f"{'layout':<14} {'requests':>9} {'prompt tok':>11} {'uncached':>9} {'cached':>7} "
+              f"{'p50':>6} {'p95':>6} {'cost':>6}")
+    lines = [header, "-" * len(header)]
+    for r in reports:
+        lines.append(
+            f"{r.layout:<14} {r.requests:>9} {r.prompt_tokens:>11} {r.uncached_tokens:>9} {r.cached_token_ratio:>7.1%} "
+            f"{r.latency['p50']:>6.2f} {r.latency['p95']:>6.2f} {r.relative_prompt_cost:>6.2f}"
+        )
+    return "\n".join(lines)
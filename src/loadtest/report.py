@@ -0,0 +1,50 @@
+# src/loadtest/report.py
+import json
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Sequence
+from ..utils.stats import percentile
+
+def latency_summary(values: Sequence[float]) -> Dict[str, float]:
+    return {
+        "p50": round(percentile(values, 50), 3),
+        "p90": round(percentile(values, 90), 3),
+        "p95": round(percentile(values, 95), 3),
+        "p99": round(percentile(values, 99), 3),
+        "max": round(max(values), 3) if values else 0.0
+    }
+
+@dataclass
+class LevelReport:
+    """Results of driving one concurrency level"""
+    concurrency: int
+    sessions: int
+    completed: int
+    errors: int
+    duration: float
+    throughput: float
+    latency: Dict[str, float]
+    max_threads: int
+    max_activity_queue: int
+    max_message_queue: int
+    max_upstream_in_flight: int
+    peak_memory_mb: float
+
+def format_table(reports: List[LevelReport]) -> str:
+    """Render level reports as a fixed-width text table"""
+    header = (f"{'conc':>5} {'done':>6} {'err':>4} {'rps':>7} {'p50':>7} {'p95':>7} {'p99':>7} "
+              f"{'threads':>8} {'actQ':>6} {'msgQ':>6} {'upstrm':>7} {'memMB':>8}")
+    lines = [header, "-" * len(header)]
+    for r in reports:
+        lines.append(
+            f"{r.concurrency:>5} {r.completed:>6} {r.errors:>4} {r.throughput:>7.2f} "
+            f"{r.latency['p50']:>7.2f} {r.latency['p95']:>7.2f} {r.latency['p99']:>7.2f} "
+            f"{r.max_threads:>8} {r.max_activity_queue:>6} {r.max_message_queue:>6} "
+            f"{r.max_upstream_in_flight:>7} {r.peak_memory_mb:>8.1f}"
+        )
+    return "\n".join(lines)
+
+def write_json(path: str, payload: Any) -> None:
+    def default(obj):
+        return asdict(obj)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2, default=default)
@@ -0,0 +1,248 @@
+# src/loadtest/simulator.py
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+from .report import LevelReport, latency_summary
+from ..ui.session import SIMULATED_SESSION_KEY, SIMULATED_USER_KEY
+
+DESTINATIONS = ["Paris", "Tokyo", "Lisbon", "New York", "Bangkok", "Rome", "Cape Town", "Hanoi"]
+INTERESTS = ["Culture", "Nature", "Food", "Adventure"]
+
+# Relative frequency of user behaviours observed on the form
+SESSION_PATTERNS: Dict[str, float] = {
+    "submit": 0.6,     # Submit once and wait for the plan
+    "rerun": 0.25,     # Submit, then keep interacting (extra reruns) while waiting
+    "resubmit": 0.15   # Submit, change their mind and submit again
+}
+
+_runtime_lock = threading.Lock()
+
+def share_test_runtime() -> None:
+    """Keep one mock Streamlit runtime installed for all simulated sessions.
+
+    AppTest 1.28 installs a mock runtime for each script run and removes it
+    when the run returns, which crashes the script threads of concurrent
+    sessions still running. Its assignments go to a subclass instead, so the
+    shared one stays in place.
+    """
+    from unittest.mock import MagicMock
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.testing.v1 import app_test
+
+    with _runtime_lock:
+        if app_test.Runtime is not Runtime:
+            return
+        runtime = MagicMock(spec=Runtime)
+        runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+        runtime.cache_storage_manager = MemoryCacheStorageManager()
+        Runtime._instance = runtime
+        app_test.Runtime = type("PerRunRuntime", (Runtime,), {})
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+@dataclass
+class SessionResult:
+    pattern: str
+    submits: int = 0
+    latency: Optional[float] = None
+    error: Optional[str] = None
+
+class ResourceSampler:
+    """Samples thread count, queue depths and memory in the background"""
+
+    def __init__(self, interval: float = 0.25, upstream_in_flight: Optional[Callable[[], int]] = None):
+        self.interval = interval
+        self.upstream_in_flight = upstream_in_flight
+        self.samples: List[Dict[str, float]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "ResourceSampler":
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        from ..agents.async_tracked_agent import AsyncActivityEmitter
+        from ..utils.cancellation import RunRegistry
+        while not self._stop.is_set():
+            self.samples.append({
+                "threads": threading.active_count(),
+                "activity_queue": AsyncActivityEmitter.pending_count(),
+                # Finished plans waiting for their session to collect them
+                "message_queue": RunRegistry.pending_outcomes(),
+                "upstream_in_flight": self.upstream_in_flight() if self.upstream_in_flight else 0,
+                "memory_mb": current_rss_mb()
+            })
+            self._stop.wait(self.interval)
+
+    def peak(self, name: str) -> float:
+        return max((s[name] for s in self.samples), default=0)
+
+class SessionSimulator:
+    """Drives one browser session through main() using Streamlit's app-testing harness"""
+
+    def __init__(self, app_path: str = "app.py", timeout: float = 300.0,
+                 poll_interval: float = 0.5, seed: Optional[int] = None):
+        self.app_path = app_path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.rng = random.Random(seed)
+
+    def choose_pattern(self) -> str:
+        return self.rng.choices(list(SESSION_PATTERNS), weights=list(SESSION_PATTERNS.values()))[0]
+
+    def _wait_for_form(self, at) -> None:
+        """Rerun until the parsed tree holds the travel form.
+
+        While a plan is processing, every script run ends in st.rerun() and
+        AppTest 1.28 parses whatever the restarted run has sent so far, which
+        may not include the form yet.
+        """
+        deadline = time.time() + self.timeout
+        while not any(widget.key == "destination_input" for widget in at.text_input):
+            if time.time() > deadline:
+                raise TimeoutError("travel form never rendered")
+            time.sleep(self.poll_interval / 4)
+            self._run(at)
+
+    def _submit(self, at) -> None:
+        self._wait_for_form(at)
+        at.text_input(key="destination_input").input(self.rng.choice(DESTINATIONS))
+        at.number_input(key="duration_input").set_value(self.rng.randint(1, 7))
+        at.selectbox(key="budget_input").select(self.rng.choice(["Budget", "Moderate", "Luxury"]))
+        at.multiselect(key="interests_input").set_value(
+            self.rng.sample(INTERESTS, self.rng.randint(1, len(INTERESTS)))
+        )
+        button = next(button for button in at.button if button.label == "Plan My Trip")
+        button.click()
+        # Wait out the whole submit run: one cut off early may never see the click
+        self._run(at, timeout=self.timeout)
+        # A timed-out run leaves this tree in place, and polling it must not submit again
+        button.set_value(False)
+
+    def _run(self, at, timeout: Optional[float] = None) -> None:
+        try:
+            at.run(timeout=timeout)
+        except RuntimeError:
+            # The activity thread keeps rerunning while processing; a timed-out
+            # script run just means the plan isn't ready yet
+            pass
+        except KeyError:
+            # AppTest 1.28 expects every run to end in a shutdown and fails to read the
+            # query string when the script stops for st.rerun(); the tree is already parsed
+            pass
+
+    @staticmethod
+    def _run_status(at) -> Optional[str]:
+        """How this session's own run ended, or None while it is still running.
+
+        Read from the run's recorded status rather than from the messages, so
+        cancelled and failed runs count as errors.
+        """
+        state = at.session_state
+        if "processing" in state and state["processing"]:
+            return None
+        if "last_run_status" in state:
+            return state["last_run_status"]
+        # Served from the plan cache without starting a run
+        return "done" if "messages" in state and state["messages"] else None
+
+    def run_session(self, pattern: Optional[str] = None) -> SessionResult:
+        from streamlit.testing.v1 import AppTest
+
+        result = SessionResult(pattern=pattern or self.choose_pattern())
+        try:
+            share_test_runtime()
+            at = AppTest.from_file(self.app_path, default_timeout=self.poll_interval * 4)
+            # AppTest gives every session the same id and email, so runs would supersede each other
+            # and share one scheduler flow
+            session_id = uuid.uuid4().hex[:12]
+            at.session_state[SIMULATED_SESSION_KEY] = session_id
+            at.session_state[SIMULATED_USER_KEY] = f"user-{session_id}"
+            # The first run imports the app and its agents, which takes longer than a poll
+            self._run(at, timeout=self.timeout)
+            self._submit(at)
+            result.submits += 1
+            started = time.time()
+
+            if result.pattern == "resubmit":
+                time.sleep(self.rng.uniform(0.5, 3.0))
+                self._submit(at)
+                result.submits += 1
+                started = time.time()
+
+            while time.time() - started < self.timeout:
+                status = self._run_status(at)
+                if status is not None:
+                    if status == "done":
+                        result.latency = time.time() - started
+                    else:
+                        result.error = status
+                    break
+                delay = self.poll_interval / 4 if result.pattern == "rerun" else self.poll_interval
+                time.sleep(delay)
+                self._run(at)
+            else:
+                result.error = "timeout"
+        except Exception as e:
+            result.error = str(e)
+        return result
+
+class LoadGenerator:
+    """Runs batches of simulated sessions at increasing concurrency levels"""
+
+    def __init__(self, simulator: SessionSimulator, sessions_per_level: int = 20,
+                 upstream_in_flight: Optional[Callable[[], int]] = None):
+        self.simulator = simulator
+        self.sessions_per_level = sessions_per_level
+        self.upstream_in_flight = upstream_in_flight
+
+    def run_level(self, concurrency: int) -> LevelReport:
+        results: List[SessionResult] = []
+        started = time.time()
+        with ResourceSampler(upstream_in_flight=self.upstream_in_flight) as sampler:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                futures = [executor.submit(self.simulator.run_session) for _ in range(self.sessions_per_level)]
+                results = [f.result() for f in futures]
+        duration = time.time() - started
+
+        latencies = [r.latency for r in results if r.latency is not None]
+        return LevelReport(
+            concurrency=concurrency,
+            sessions=len(results),
+            completed=len(latencies),
+            errors=sum(1 for r in results if r.error),
+            duration=round(duration, 2),
+            throughput=round(len(latencies) / duration, 3) if duration else 0.0,
+            latency=latency_summary(latencies),
+            max_threads=int(sampler.peak("threads")),
+            max_activity_queue=int(sampler.peak("activity_queue")),
+            max_message_queue=int(sampler.peak("message_queue")),
+            max_upstream_in_flight=int(sampler.peak("upstream_in_flight")),
+            peak_memory_mb=round(sampler.peak("memory_mb"), 1)
+        )
+
+    def run(self, levels: List[int]) -> List[LevelReport]:
+        return [self.run_level(level) for level in levels]
@@ -0,0 +1,226 @@
+# src/loadtest/stub_server.py
+import itertools
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from ..agents.cassette import Interaction, request_key
+
+DEFAULT_ANSWER = "Thought: I now can give a great answer\nFinal Answer: Day 1: Explore the city centre."
+
+def _synthetic_interaction(payload: Dict, usage: Optional[Dict] = None, answer: str = DEFAULT_ANSWER) -> Interaction:
+    """Fallback answer for requests when the cassette is empty, streamed if the request asks for it"""
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    usage = usage or {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120}
+    head = {"id": completion_id, "created": int(time.time()), "model": payload.get("model", "stub")}
+    if not payload.get("stream"):
+        body = json.dumps({
+            **head,
+            "object": "chat.completion",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}],
+            "usage": usage
+        })
+        return Interaction(
+            key=request_key(payload), path="/v1/chat/completions", request=payload, status=200,
+            headers={"content-type": "application/json"}, body=body, ttfb=0.5, elapsed=1.0
+        )
+
+    def chunk(delta: Dict, finish_reason: Optional[str] = None) -> Dict:
+        return {**head, "object": "chat.completion.chunk",
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+
+    # One event per word, keeping the whitespace, as an OpenAI-compatible server streams them
+    words = re.findall(r"\s*\S+", answer)
+    events = [chunk({"role": "assistant", "content": ""})] + [chunk({"content": word}) for word in words]
+    events.append(chunk({}, "stop"))
+    if (payload.get("stream_options") or {}).get("include_usage"):
+        events.append({**head, "object": "chat.completion.chunk", "choices": [], "usage": usage})
+    body = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+    return Interaction(
+        key=request_key(payload), path="/v1/chat/completions", request=payload, status=200,
+        headers={"content-type": "text/event-stream"}, body=body, ttfb=0.5, elapsed=1.0
+    )
+
+class PrefixCacheSimulator:
+    """Block-level prompt prefix cache, like automatic prefix caching in inference servers.
+
+    The prompt is cut into blocks of `block_tokens` (at about 4 characters
+    per token). A block is a hit only when it and every block before it have
+    been seen, so a request reuses the longest previously sent prefix.
+    Uncached tokens cost `prefill_seconds_per_1k` of time to first byte.
+    """
+
+    def __init__(self, block_tokens: int = 16, max_blocks: int = 50_000, prefill_seconds_per_1k: float = 0.4):
+        self.block_chars = block_tokens * 4
+        self.max_blocks = max_blocks
+        self.prefill_seconds_per_1k = prefill_seconds_per_1k
+        self._blocks: "OrderedDict[int, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def prompt_text(payload: Dict) -> str:
+        return "".join(f"<{m.get('role')}>{m.get('content')}" for m in payload.get("messages", []))
+
+    def lookup(self, payload: Dict) -> Tuple[int, int]:
+        """Return (prompt tokens, cached tokens) for a request and cache its blocks"""
+        text = self.prompt_text(payload)
+        prompt_tokens = max(1, len(text) // 4)
+        cached_blocks, chain, hit = 0, 0, True
+        with self._lock:
+            for start in range(0, len(text) - self.block_chars + 1, self.block_chars):
+                chain = hash((chain, text[start:start + self.block_chars]))
+                if hit and chain in self._blocks:
+                    cached_blocks += 1
+                    self._blocks.move_to_end(chain)
+                else:
+                    hit = False
+                    self._blocks[chain] = None
+            while len(self._blocks) > self.max_blocks:
+                self._blocks.popitem(last=False)
+        return prompt_tokens, min(prompt_tokens, cached_blocks * self.block_chars // 4)
+
+    def prefill_delay(self, uncached_tokens: int) -> float:
+        return uncached_tokens / 1000 * self.prefill_seconds_per_1k
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients closing connections early (cancelled or losing hedged requests) are expected
+        pass
+
+class ReplayStubServer:
+    """Local OpenAI-compatible server that replays recorded exchanges.
+
+    Requests are matched to recordings by model and messages; unmatched
+    requests are answered from the cassette in round-robin order. Recorded
+    timing is reproduced, multiplied by `time_scale`. `extra_delay`, when
+    given, returns additional seconds to stall each request before it is
+    answered, to simulate a slow or overloaded backend. With a
+    `prefix_cache`, uncached prompt tokens add prefill time and synthetic
+    answers report cached tokens in their usage. Synthetic answers, given
+    when there is nothing to replay, say `answer`.
+    """
+
+    def __init__(self, interactions: List[Interaction], host: str = "127.0.0.1",
+                 port: int = 0, time_scale: float = 1.0,
+                 extra_delay: Optional[Callable[[], float]] = None,
+                 prefix_cache: Optional[PrefixCacheSimulator] = None,
+                 answer: str = DEFAULT_ANSWER):
+        self.time_scale = time_scale
+        self.answer = answer
+        self.extra_delay = extra_delay
+        self.prefix_cache = prefix_cache
+        self.by_key: Dict[str, List[Interaction]] = {}
+        for interaction in interactions:
+            self.by_key.setdefault(interaction.key, []).append(interaction)
+        self._round_robin = itertools.cycle(interactions) if interactions else None
+        self._lock = threading.Lock()
+        self.requests_served = 0
+        self.in_flight = 0
+        self._server = _QuietHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "ReplayStubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def match(self, payload: Dict, usage: Optional[Dict] = None) -> Interaction:
+        with self._lock:
+            candidates = self.by_key.get(request_key(payload))
+            if candidates:
+                # Rotate so repeated identical prompts replay successive recordings
+                candidates.append(candidates.pop(0))
+                return candidates[-1]
+            if self._round_robin:
+                return next(self._round_robin)
+        return _synthetic_interaction(payload, usage, self.answer)
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.rstrip('/').endswith('/models'):
+                    self._send_json(200, {"object": "list", "data": [{"id": "stub", "object": "model"}]})
+                else:
+                    self._send_json(404, {"error": {"message": "not found"}})
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    payload = {}
+                with stub._lock:
+                    stub.in_flight += 1
+                try:
+                    if stub.extra_delay:
+                        time.sleep(stub.extra_delay())
+                    usage = None
+                    if stub.prefix_cache:
+                        prompt_tokens, cached_tokens = stub.prefix_cache.lookup(payload)
+                        time.sleep(stub.prefix_cache.prefill_delay(prompt_tokens - cached_tokens) * stub.time_scale)
+                        usage = {
+                            "prompt_tokens": prompt_tokens,
+                            "completion_tokens": 20,
+                            "total_tokens": prompt_tokens + 20,
+                            "prompt_tokens_details": {"cached_tokens": cached_tokens}
+                        }
+                    stub.replay(self, stub.match(payload, usage))
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+                        stub.requests_served += 1
+
+            def _send_json(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def replay(self, handler: BaseHTTPRequestHandler, interaction: Interaction) -> None:
+        """Write a recorded response, reproducing time to first byte and total duration"""
+        time.sleep(interaction.ttfb * self.time_scale)
+        handler.send_response(interaction.status)
+        handler.send_header('Content-Type', interaction.headers.get('content-type', 'application/json'))
+        if not interaction.streamed:
+            data = interaction.body.encode()
+            time.sleep(max(0.0, interaction.elapsed - interaction.ttfb) * self.time_scale)
+            handler.send_header('Content-Length', str(len(data)))
+            handler.end_headers()
+            handler.wfile.write(data)
+            return
+
+        # Spread server-sent events evenly over the recorded streaming time
+        handler.send_header('Connection', 'close')
+        handler.end_headers()
+        events = [e for e in interaction.body.split("\n\n") if e.strip()]
+        gap = max(0.0, interaction.elapsed - interaction.ttfb) * self.time_scale / max(1, len(events))
+        for event in events:
+            handler.wfile.write(f"{event}\n\n".encode())
+            handler.wfile.flush()
+            time.sleep(gap)
+        handler.close_connection = True
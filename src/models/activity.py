@@ -1,12 +1,15 @@
 # src/models/activity.py
-from typing import Literal, Dict, Any
+from typing import Literal, Dict, Any, Optional
 import time
 
 class Activity:
-    def __init__(self, agent_role: str, content: str, activity_type: Literal["info", "success", "error"] = "info"):
+    def __init__(self, agent_role: str, content: str, activity_type: Literal["info", "success", "error"] = "info",
+                 metadata: Optional[Dict[str, Any]] = None, run_id: Optional[str] = None):
         self.type = activity_type
         self.agent = agent_role
         self.content = content
+        self.metadata = metadata or {}
+        self.run_id = run_id
         self.timestamp = time.time()
 
     def to_dict(self) -> Dict[str, Any]:
@@ -14,5 +17,7 @@ class Activity:
             "type": self.type,
             "agent": self.agent,
             "content": self.content,
+            "metadata": self.metadata,
+            "run_id": self.run_id,
             "timestamp": self.timestamp
         }
\ No newline at end of file
@@ -0,0 +1,18 @@
+# src/models/itinerary.py
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List
+import time
+
+@dataclass
+class DayPlan:
+    """One completed day of an itinerary, parsed from agent output"""
+    day: int
+    title: str
+    content: str
+    places: List[str] = field(default_factory=list)
+    costs: List[str] = field(default_factory=list)
+    source: str = ""
+    completed_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
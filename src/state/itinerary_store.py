@@ -0,0 +1,84 @@
+# src/state/itinerary_store.py
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from ..models.itinerary import DayPlan
+from ..utils.stats import percentile
+
+class ItineraryStore:
+    """Thread-safe store of parsed days per run, read by the UI on each rerun.
+
+    A later source (e.g. the local expert) replaces an earlier one's version
+    of the same day. Only the most recent `max_runs` runs are kept.
+    """
+    _lock = threading.Lock()
+    _runs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    _first_day_latencies: List[float] = []
+    max_runs = 200
+
+    @classmethod
+    def start_run(cls, run_id: str, started_at: Optional[float]) -> None:
+        """Start collecting days for a run; speculative runs pass None until adopted"""
+        with cls._lock:
+            cls._runs[run_id] = {"started_at": started_at, "days": {}, "sources": {}, "first_day_latency": None}
+            while len(cls._runs) > cls.max_runs:
+                cls._runs.popitem(last=False)
+
+    @classmethod
+    def publish(cls, run_id: str, day: DayPlan, source_rank: int = 0) -> None:
+        """Publish a completed day; lower-ranked sources never overwrite higher ones"""
+        with cls._lock:
+            run = cls._runs.get(run_id)
+            if run is None:
+                return
+            if run["sources"].get(day.day, -1) > source_rank:
+                return
+            run["days"][day.day] = day.to_dict()
+            run["sources"][day.day] = source_rank
+            if run["first_day_latency"] is None and run["started_at"] is not None:
+                run["first_day_latency"] = day.completed_at - run["started_at"]
+                cls._first_day_latencies.append(run["first_day_latency"])
+                del cls._first_day_latencies[:-1000]
+
+    @classmethod
+    def adopt_run(cls, run_id: str, started_at: float) -> None:
+        """Start the clock of a speculative run when a submission adopts it"""
+        with cls._lock:
+            run = cls._runs.get(run_id)
+            if run is None:
+                cls._runs[run_id] = {"started_at": started_at, "days": {}, "sources": {}, "first_day_latency": None}
+                return
+            run["started_at"] = started_at
+            if run["days"]:
+                # Days parsed before the submission appear immediately
+                run["first_day_latency"] = 0.0
+                cls._first_day_latencies.append(0.0)
+                del cls._first_day_latencies[:-1000]
+
+    @classmethod
+    def has_days(cls, run_id: str, source: str) -> bool:
+        with cls._lock:
+            run = cls._runs.get(run_id)
+            return bool(run) and any(d["source"] == source for d in run["days"].values())
+
+    @classmethod
+    def get_days(cls, run_id: str) -> List[Dict[str, Any]]:
+        with cls._lock:
+            run = cls._runs.get(run_id)
+            return [run["days"][n] for n in sorted(run["days"])] if run else []
+
+    @classmethod
+    def first_day_latency(cls, run_id: str) -> Optional[float]:
+        with cls._lock:
+            run = cls._runs.get(run_id)
+            return run["first_day_latency"] if run else None
+
+    @classmethod
+    def first_day_latency_summary(cls) -> Dict[str, float]:
+        with cls._lock:
+            latencies = list(cls._first_day_latencies)
+        return {
+            "runs": len(latencies),
+            "p50": round(percentile(latencies, 50), 1),
+            "p95": round(percentile(latencies, 95), 1)
+        }
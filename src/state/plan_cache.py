@@ -0,0 +1,154 @@
+# src/state/plan_cache.py
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from .state_manager import TravelPreferences
+
+PlanKey = Tuple[str, int, str, Tuple[str, ...]]
+
+def plan_key(preferences: TravelPreferences) -> PlanKey:
+    """Normalize preferences so equivalent requests share a cache entry"""
+    return (
+        " ".join(preferences.destination.lower().split()),
+        int(preferences.duration),
+        preferences.budget,
+        tuple(sorted(preferences.interests))
+    )
+
+def is_peak_hour(peak_hours: Tuple[int, int], at: Optional[float] = None) -> bool:
+    start, end = peak_hours
+    hour = time.localtime(at).tm_hour
+    return start <= hour < end if start <= end else hour >= start or hour < end
+
+@dataclass
+class CachedPlan:
+    plan: str
+    created_at: float
+    expires_at: float
+    tokens: int
+    source: str  # "interactive" or "warm"
+
+class PlanCache:
+    """Finished plans keyed by normalized preferences, with load-reduction accounting"""
+    _lock = threading.Lock()
+    _entries: Dict[PlanKey, CachedPlan] = {}
+    ttl_seconds = 6 * 3600
+    peak_hours: Tuple[int, int] = (9, 21)
+    cache_interactive = True
+    max_entries = 1000
+    lookups = 0
+    hits = 0
+    warm_hits = 0
+    peak_tokens_saved = 0
+    peak_tokens_spent = 0
+
+    @classmethod
+    def configure(cls, ttl_seconds: float, peak_hours: Tuple[int, int], cache_interactive: bool = True) -> None:
+        cls.ttl_seconds = ttl_seconds
+        cls.peak_hours = peak_hours
+        cls.cache_interactive = cache_interactive
+
+    @classmethod
+    def get(cls, preferences: TravelPreferences) -> Optional[CachedPlan]:
+        """Look up a fresh plan for an interactive request"""
+        now = time.time()
+        with cls._lock:
+            cls.lookups += 1
+            entry = cls._entries.get(plan_key(preferences))
+            if entry is None or entry.expires_at <= now:
+                return None
+            cls.hits += 1
+            if entry.source == "warm":
+                cls.warm_hits += 1
+            if is_peak_hour(cls.peak_hours, now):
+                cls.peak_tokens_saved += entry.tokens
+            return entry
+
+    @classmethod
+    def put(cls, preferences: TravelPreferences, plan: str, tokens: int, source: str) -> None:
+        if source == "interactive" and not cls.cache_interactive:
+            return
+        now = time.time()
+        with cls._lock:
+            cls._entries[plan_key(preferences)] = CachedPlan(plan, now, now + cls.ttl_seconds, tokens, source)
+            if source == "interactive" and is_peak_hour(cls.peak_hours, now):
+                cls.peak_tokens_spent += tokens
+            if len(cls._entries) > cls.max_entries:
+                oldest = min(cls._entries, key=lambda k: cls._entries[k].expires_at)
+                del cls._entries[oldest]
+
+    @classmethod
+    def expires_in(cls, key: PlanKey) -> float:
+        """Seconds until the entry expires; 0 when missing or stale"""
+        with cls._lock:
+            entry = cls._entries.get(key)
+            return max(0.0, entry.expires_at - time.time()) if entry else 0.0
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, float]:
+        with cls._lock:
+            peak_total = cls.peak_tokens_saved + cls.peak_tokens_spent
+            return {
+                "entries": len(cls._entries),
+                "hit_ratio": round(cls.hits / cls.lookups, 3) if cls.lookups else 0.0,
+                "warm_hit_ratio": round(cls.warm_hits / cls.lookups, 3) if cls.lookups else 0.0,
+                "peak_tokens_saved": cls.peak_tokens_saved,
+                "peak_load_reduction": round(cls.peak_tokens_saved / peak_total, 3) if peak_total else 0.0
+            }
+
+class PreferenceHistory:
+    """Counts of submitted preferences with an exponentially decaying trend score.
+
+    At most `max_keys` combinations are tracked; beyond that the ones with
+    the lowest current score are forgotten.
+    """
+    _lock = threading.Lock()
+    _counts: Dict[PlanKey, int] = {}
+    _trend: Dict[PlanKey, Tuple[float, float]] = {}  # key -> (score, last update)
+    _preferences: Dict[PlanKey, TravelPreferences] = {}  # Latest submission, in the user's spelling
+    half_life_seconds = 3 * 3600
+    max_keys = 5000
+
+    @classmethod
+    def record(cls, preferences: TravelPreferences, at: Optional[float] = None) -> None:
+        at = at or time.time()
+        key = plan_key(preferences)
+        with cls._lock:
+            cls._counts[key] = cls._counts.get(key, 0) + 1
+            score, updated = cls._trend.get(key, (0.0, at))
+            cls._trend[key] = (cls._decay(score, at - updated) + 1.0, at)
+            cls._preferences[key] = preferences
+            if len(cls._trend) > cls.max_keys:
+                cls._forget_least_popular(at)
+
+    @classmethod
+    def _forget_least_popular(cls, now: float) -> None:
+        # Drop a tenth at a time so a full history isn't re-sorted on every submit
+        ranked = sorted(cls._trend, key=lambda k: cls._score(k, now))
+        for key in ranked[:len(ranked) - int(cls.max_keys * 0.9)]:
+            del cls._trend[key], cls._counts[key], cls._preferences[key]
+
+    @classmethod
+    def _decay(cls, score: float, elapsed: float) -> float:
+        return score * 0.5 ** (max(0.0, elapsed) / cls.half_life_seconds)
+
+    @classmethod
+    def _score(cls, key: PlanKey, now: float) -> float:
+        score, updated = cls._trend[key]
+        return cls._decay(score, now - updated) + math.log1p(cls._counts[key])
+
+    @classmethod
+    def preferences(cls, key: PlanKey) -> Optional[TravelPreferences]:
+        """The most recent submission for a key, as the user typed it"""
+        with cls._lock:
+            return cls._preferences.get(key)
+
+    @classmethod
+    def popular(cls, limit: int = 10, min_count: int = 2) -> List[Tuple[PlanKey, float]]:
+        """Most requested combinations, ranked by recent trend plus long-run popularity"""
+        now = time.time()
+        with cls._lock:
+            scored = [(key, cls._score(key, now)) for key in cls._trend if cls._counts[key] >= min_count]
+        return sorted(scored, key=lambda item: item[1], reverse=True)[:limit]
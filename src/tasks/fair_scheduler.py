@@ -0,0 +1,233 @@
+# src/tasks/fair_scheduler.py
+import itertools
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional
+from ..utils.cancellation import CancellationToken
+from ..utils.error_handler import TravelPlannerError, logger
+
+# Share of capacity each priority class receives relative to the others
+PRIORITY_WEIGHTS: Dict[str, float] = {"interactive": 4.0, "batch": 1.0}
+
+class QuotaExceededError(TravelPlannerError):
+    """Raised when a flow already has as many queued runs as its quota allows"""
+    pass
+
+@dataclass
+class Job:
+    """A queued plan run belonging to one flow (a user or session)"""
+    job_id: str
+    flow_id: str
+    priority: str
+    fn: Callable[[], None]
+    token: CancellationToken
+    cost: float = 1.0
+    on_drop: Optional[Callable[[], None]] = None  # Called, under the scheduler lock, if cancelled while queued
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    virtual_start: float = 0.0
+    virtual_finish: float = 0.0
+    state: str = "queued"
+
+    @property
+    def wait_time(self) -> Optional[float]:
+        return self.started_at - self.submitted_at if self.started_at else None
+
+@dataclass
+class Flow:
+    weight: float = 1.0
+    queue: Deque[Job] = field(default_factory=deque)
+    running: int = 0
+    last_finish: float = 0.0
+
+class FairScheduler:
+    """Weighted fair queueing of plan runs across flows.
+
+    Each flow has its own queue. A job's virtual finish time is its virtual
+    start plus cost divided by the product of its priority-class weight and
+    the flow's weight; workers always take the queued job with the smallest
+    virtual finish time. A flow that submits many runs therefore only
+    delays itself, while interactive runs get a larger share than batch.
+
+    Batch runs additionally yield to interactive ones: they are not started
+    while interactive runs are waiting, and a running batch job is cancelled
+    when an interactive run arrives and every worker is busy.
+    """
+    _instance: Optional["FairScheduler"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, workers: int = 4, max_queued_per_flow: int = 5,
+                 max_running_per_flow: int = 2,
+                 priority_weights: Optional[Dict[str, float]] = None,
+                 flow_weights: Optional[Dict[str, float]] = None):
+        self.workers = max(1, workers)
+        self.max_queued_per_flow = max_queued_per_flow
+        self.max_running_per_flow = max_running_per_flow
+        self.priority_weights = priority_weights or dict(PRIORITY_WEIGHTS)
+        self.flow_weights = flow_weights or {}
+        self._flows: Dict[str, Flow] = {}
+        self._jobs: Dict[str, Job] = {}
+        self._virtual_time = 0.0
+        self._service_time = 0.0  # Moving average of run durations
+        self._running = 0
+        self._running_jobs: Dict[str, Job] = {}
+        self._ids = itertools.count(1)
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"plan-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    @classmethod
+    def get_instance(cls, config) -> "FairScheduler":
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(
+                    workers=config.max_concurrent_runs,
+                    max_queued_per_flow=config.max_queued_runs_per_user,
+                    max_running_per_flow=config.max_running_runs_per_user
+                )
+            return cls._instance
+
+    def check_quota(self, flow_id: str) -> None:
+        """Raise QuotaExceededError if the flow can't queue another run right now"""
+        with self._cond:
+            self._check_quota(self._flows.get(flow_id))
+
+    def _check_quota(self, flow: Optional[Flow]) -> None:
+        # Cancelled jobs stay in the queue until they reach its head, but no longer count
+        queued = sum(1 for job in flow.queue if job.state == "queued" and not job.token.cancelled) if flow else 0
+        if queued >= self.max_queued_per_flow:
+            raise QuotaExceededError(
+                f"You already have {queued} plans waiting; please wait for one to finish"
+            )
+
+    def submit(self, flow_id: str, fn: Callable[[], None], token: CancellationToken,
+               priority: str = "interactive", cost: float = 1.0, job_id: Optional[str] = None,
+               on_drop: Optional[Callable[[], None]] = None) -> Job:
+        """Queue a run for a flow; raises QuotaExceededError when the flow's queue is full"""
+        with self._cond:
+            flow = self._flows.setdefault(flow_id, Flow(weight=self.flow_weights.get(flow_id, 1.0)))
+            self._check_quota(flow)
+            job = Job(job_id=job_id or f"job-{next(self._ids)}", flow_id=flow_id,
+                      priority=priority, fn=fn, token=token, cost=cost, on_drop=on_drop)
+            weight = self.priority_weights.get(priority, 1.0) * flow.weight
+            job.virtual_start = max(self._virtual_time, flow.last_finish)
+            job.virtual_finish = job.virtual_start + cost / weight
+            flow.last_finish = job.virtual_finish
+            flow.queue.append(job)
+            self._jobs[job.job_id] = job
+            if priority == "interactive" and self._running >= self.workers:
+                self._preempt_batch_job()
+            self._cond.notify()
+            return job
+
+    def promote(self, job_id: str, priority: str = "interactive") -> bool:
+        """Move a job to another priority class; False if it was already cancelled"""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.token.cancelled:
+                return False
+            job.priority = priority  # Batch preemption reads this under the same lock
+            return True
+
+    def _preempt_batch_job(self) -> None:
+        batch = [j for j in self._running_jobs.values() if j.priority == "batch" and not j.token.cancelled]
+        if batch:
+            # Cancel the most recently started one; it has done the least work
+            victim = max(batch, key=lambda j: j.started_at)
+            victim.token.cancel("yielding to interactive traffic")
+
+    def _eligible_heads(self) -> List[Job]:
+        heads = []
+        for flow in self._flows.values():
+            while flow.queue and flow.queue[0].token.cancelled:
+                self._drop(flow.queue.popleft())
+            if flow.queue and flow.running < self.max_running_per_flow:
+                heads.append(flow.queue[0])
+        if any(job.priority != "batch" for job in heads):
+            heads = [job for job in heads if job.priority != "batch"]
+        return heads
+
+    @staticmethod
+    def _drop(job: Job) -> None:
+        job.state = "cancelled"
+        if job.on_drop:
+            try:
+                job.on_drop()
+            except Exception as e:
+                logger.error(f"Error dropping run {job.job_id}: {str(e)}")
+
+    def _next_job(self) -> Job:
+        with self._cond:
+            while True:
+                heads = self._eligible_heads()
+                if heads:
+                    job = min(heads, key=lambda j: (j.virtual_finish, j.submitted_at))
+                    self._flows[job.flow_id].queue.popleft()
+                    self._flows[job.flow_id].running += 1
+                    self._running += 1
+                    self._running_jobs[job.job_id] = job
+                    self._virtual_time = max(self._virtual_time, job.virtual_start)
+                    job.state = "running"
+                    job.started_at = time.time()
+                    return job
+                self._cond.wait(timeout=1.0)
+
+    def _work(self) -> None:
+        while True:
+            job = self._next_job()
+            try:
+                job.fn()
+            except Exception as e:
+                logger.error(f"Error in scheduled run {job.job_id}: {str(e)}")
+            finally:
+                with self._cond:
+                    job.finished_at = time.time()
+                    job.state = "done"
+                    self._flows[job.flow_id].running -= 1
+                    self._running -= 1
+                    self._running_jobs.pop(job.job_id, None)
+                    duration = job.finished_at - job.started_at
+                    self._service_time = duration if not self._service_time else \
+                        0.8 * self._service_time + 0.2 * duration
+                    self._forget_old_jobs()
+                    self._cond.notify_all()
+
+    def _forget_old_jobs(self, keep: int = 1000) -> None:
+        if len(self._jobs) > keep:
+            finished = [j for j in self._jobs.values() if j.state in ("done", "cancelled")]
+            for job in sorted(finished, key=lambda j: j.submitted_at)[:len(self._jobs) - keep]:
+                del self._jobs[job.job_id]
+
+    def status(self, job_id: str) -> Optional[Dict[str, float]]:
+        """Queue position (1 = next) and estimated wait in seconds for a queued job"""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.state != "queued":
+                return {"state": job.state, "position": 0, "eta": 0.0}
+            queued = sorted(
+                (j for f in self._flows.values() for j in f.queue if not j.token.cancelled),
+                key=lambda j: (j.virtual_finish, j.submitted_at)
+            )
+            position = next((i for i, j in enumerate(queued) if j is job), len(queued)) + 1
+            # Runs ahead of this one, plus the ones occupying workers, drain `workers` at a time
+            eta = (position - 1 + self._running) / self.workers * self._service_time
+            return {"state": job.state, "position": position, "eta": round(eta, 1)}
+
+    def queue_depth(self, priority: Optional[str] = None) -> int:
+        with self._cond:
+            return sum(
+                1 for f in self._flows.values() for j in f.queue
+                if not j.token.cancelled and (priority is None or j.priority == priority)
+            )
+
+    @property
+    def running(self) -> int:
+        return self._running
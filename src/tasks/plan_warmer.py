@@ -0,0 +1,128 @@
+# src/tasks/plan_warmer.py
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Optional, Set, Tuple
+from .fair_scheduler import FairScheduler
+from ..agents.async_tracked_agent import AsyncActivityEmitter
+from ..state.plan_cache import PlanCache, PlanKey, PreferenceHistory, is_peak_hour
+from ..state.state_manager import TravelPreferences
+from ..utils.cancellation import CancellationToken, RunCancelledError
+from ..utils.error_handler import logger
+
+PlanComputer = Callable[[TravelPreferences, CancellationToken], str]
+
+class PlanWarmer:
+    """Precomputes popular plans in the background during low-load windows.
+
+    Candidates are the most popular and trending preference combinations
+    that are missing from the plan cache or expire within `refresh_margin`.
+    Warm runs go through the FairScheduler as preemptible batch jobs, so they
+    never delay interactive runs, and are limited by an hourly token budget.
+    """
+    _instance: Optional["PlanWarmer"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, compute_plan: PlanComputer, scheduler: FairScheduler,
+                 token_budget_per_hour: int, peak_hours: Tuple[int, int] = (9, 21),
+                 refresh_margin: float = 0.2, max_utilization: float = 0.5,
+                 interval: float = 30.0):
+        self.compute_plan = compute_plan
+        self.scheduler = scheduler
+        self.token_budget_per_hour = token_budget_per_hour
+        self.peak_hours = peak_hours
+        self.refresh_margin = refresh_margin
+        self.max_utilization = max_utilization
+        self.interval = interval
+        self._spent: Deque[Tuple[float, int]] = deque()
+        self._tokens_per_plan = 4000  # Estimate until warm runs report actual usage
+        self._in_flight: Set[PlanKey] = set()
+        self._lock = threading.Lock()
+        self.warmed = 0
+        self.preempted = 0
+
+    @classmethod
+    def start(cls, config, compute_plan: PlanComputer) -> Optional["PlanWarmer"]:
+        """Start the process-wide warmer once; disabled when the token budget is 0"""
+        if config.warm_token_budget_per_hour <= 0:
+            return None
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(
+                    compute_plan,
+                    FairScheduler.get_instance(config),
+                    token_budget_per_hour=config.warm_token_budget_per_hour,
+                    peak_hours=config.peak_hours
+                )
+                threading.Thread(target=cls._instance._loop, name="plan-warmer", daemon=True).start()
+            return cls._instance
+
+    def tokens_spent_last_hour(self) -> int:
+        cutoff = time.time() - 3600
+        with self._lock:
+            while self._spent and self._spent[0][0] < cutoff:
+                self._spent.popleft()
+            return sum(tokens for _, tokens in self._spent)
+
+    def is_low_load(self) -> bool:
+        if self.scheduler.queue_depth("interactive") > 0:
+            return False
+        # During peak hours only warm when the pool is completely idle
+        limit = 0 if is_peak_hour(self.peak_hours) else int(self.scheduler.workers * self.max_utilization)
+        return self.scheduler.running <= limit and self.scheduler.queue_depth() == 0
+
+    def next_candidate(self) -> Optional[PlanKey]:
+        refresh_before = PlanCache.ttl_seconds * self.refresh_margin
+        for key, _ in PreferenceHistory.popular():
+            if key in self._in_flight:
+                continue
+            if PlanCache.expires_in(key) <= refresh_before:
+                return key
+        return None
+
+    def _loop(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"Error in plan warmer: {str(e)}")
+
+    def tick(self) -> bool:
+        """Start at most one warm run if load and budget allow; returns whether one started"""
+        if not self.is_low_load():
+            return False
+        if self.tokens_spent_last_hour() + self._tokens_per_plan > self.token_budget_per_hour:
+            return False
+        key = self.next_candidate()
+        preferences = PreferenceHistory.preferences(key) if key is not None else None
+        if preferences is None:
+            return False
+
+        token = CancellationToken()
+        with self._lock:
+            self._in_flight.add(key)
+        self.scheduler.submit(
+            flow_id="plan-warmer", fn=lambda: self._warm(key, preferences, token),
+            token=token, priority="batch", job_id=f"warm-{token.run_id}"
+        )
+        return True
+
+    def _warm(self, key: PlanKey, preferences: TravelPreferences, token: CancellationToken) -> None:
+        tokens = 0
+        try:
+            plan = self.compute_plan(preferences, token)
+            tokens = token.stats.tokens_used or len(plan) // 4
+            PlanCache.put(preferences, plan, tokens, source="warm")
+            with self._lock:
+                self._tokens_per_plan = int(0.7 * self._tokens_per_plan + 0.3 * tokens)
+                self.warmed += 1
+        except RunCancelledError:
+            tokens = token.stats.tokens_used
+            with self._lock:
+                self.preempted += 1
+        finally:
+            AsyncActivityEmitter.discard_run(token.run_id)
+            with self._lock:
+                self._spent.append((time.time(), tokens))
+                self._in_flight.discard(key)
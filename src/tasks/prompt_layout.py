@@ -0,0 +1,58 @@
+# src/tasks/prompt_layout.py
+"""Prompt text for the planning tasks, laid out for prompt prefix caching.
+
+CrewAI sends the agent's role, goal and backstory, then the task
+description and expected output, then the task context. Backends reuse
+the longest prompt prefix they have seen before, so descriptions are
+fixed strings and the trip request is passed as context, at the end.
+Each task only gets the request fields it uses; the rest would be
+uncached tokens on every call.
+"""
+from typing import Dict, List, Optional, Tuple
+
+# Task name -> (description, expected output); must not depend on the request
+TASK_INSTRUCTIONS: Dict[str, Tuple[str, str]] = {
+    'travel_planner': (
+        "Create a travel plan for the trip request, one 'Day N: title' section per day",
+        "A detailed day-by-day travel itinerary"
+    ),
+    'local_expert': (
+        "Review and enhance the travel plan with local insights",
+        "Enhanced plan with local recommendations and their detailed address/contact"
+    ),
+    'budget_analyst': (
+        "Estimate the cost of each day of the travel plan for the requested budget",
+        "A per-day and total cost breakdown with money-saving tips"
+    ),
+    'food_guide': (
+        "Recommend where to eat for each day of the travel plan",
+        "Breakfast, lunch and dinner suggestions per day with addresses and price range"
+    ),
+    'transport_planner': (
+        "Plan transport between the places in the travel plan",
+        "Per-day transport directions, passes to buy and estimated travel times"
+    )
+}
+
+# Task name -> trip request fields its prompt needs; specialists read the rest from the plan
+TASK_REQUEST_FIELDS: Dict[str, Tuple[str, ...]] = {
+    'travel_planner': ('destination', 'duration', 'budget', 'interests'),
+    'local_expert': (),
+    'budget_analyst': ('budget',),
+    'food_guide': ('destination',),
+    'transport_planner': ('destination',)
+}
+
+def trip_request(destination: str, duration: int, budget: str, interests: List[str],
+                 task: str = 'travel_planner') -> Optional[str]:
+    """The variable part of a task's prompt, in a fixed field order; None if it needs none"""
+    fields = {
+        'destination': f"destination: {destination}",
+        'duration': f"duration: {int(duration)} days",
+        'budget': f"budget: {budget}",
+        'interests': f"interests: {', '.join(sorted(interests))}"
+    }
+    wanted = TASK_REQUEST_FIELDS[task]
+    if not wanted:
+        return None
+    return "Trip request: " + "; ".join(fields[name] for name in wanted)
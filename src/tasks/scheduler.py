@@ -0,0 +1,177 @@
+# src/tasks/scheduler.py
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from .task_graph import TaskGraph, TaskNode
+from ..agents.async_tracked_agent import AsyncActivityEmitter
+from ..models.activity import Activity
+from ..utils.cancellation import CancellationMetrics, CancellationToken, RunCancelledError
+
+TaskExecutor = Callable[[TaskNode, Optional[str]], Awaitable[str]]
+
+@dataclass
+class ScheduleResult:
+    """Outputs and timings of one graph run"""
+    outputs: Dict[str, str] = field(default_factory=dict)
+    durations: Dict[str, float] = field(default_factory=dict)
+    critical_path: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)  # Optional tasks left out of the result
+    wall_time: float = 0.0
+    final_output: str = ""
+
+    @property
+    def critical_path_time(self) -> float:
+        return sum(self.durations.get(name, 0.0) for name in self.critical_path)
+
+    @property
+    def total_task_time(self) -> float:
+        return sum(self.durations.values())
+
+class DAGScheduler:
+    """Runs a TaskGraph with as much parallelism as its dependencies allow.
+
+    Pass `limit` to share one concurrency limit between several graphs
+    running on the same event loop, e.g. the destinations of a comparison.
+    """
+    # Per-task caps are shared by every run (and event loop) in the process, so they live on the class
+    _task_limits: Dict[Tuple[str, int], threading.BoundedSemaphore] = {}
+    _limits_lock = threading.Lock()
+    _poll_interval = 0.05
+
+    def __init__(self, max_concurrency: int = 4, default_task_concurrency: Optional[int] = None,
+                 limit: Optional[asyncio.Semaphore] = None):
+        self.max_concurrency = max(1, max_concurrency)
+        self.default_task_concurrency = default_task_concurrency
+        self.limit = limit
+
+    @classmethod
+    def _task_limit(cls, name: str, limit: int) -> threading.BoundedSemaphore:
+        # Keyed by the limit as well, so a changed config value takes effect for new runs
+        with cls._limits_lock:
+            key = (name, limit)
+            if key not in cls._task_limits:
+                cls._task_limits[key] = threading.BoundedSemaphore(limit)
+            return cls._task_limits[key]
+
+    @classmethod
+    async def _acquire(cls, semaphore: threading.BoundedSemaphore) -> None:
+        """Wait for a process-wide permit without parking an executor thread.
+
+        Polling keeps the wait cancellable: a cancelled waiter never ends
+        up holding a permit that nobody releases.
+        """
+        while not semaphore.acquire(blocking=False):
+            await asyncio.sleep(cls._poll_interval)
+
+    @staticmethod
+    def build_context(graph: TaskGraph, node: TaskNode, outputs: Dict[str, str]) -> Optional[str]:
+        """Join a node's own context and the outputs of its dependencies into a single string"""
+        parts = [node.context] if node.context else []
+        parts.extend(
+            f"Output of {graph.nodes[dep].task.agent.role}:\n{outputs[dep]}"
+            for dep in node.depends_on
+        )
+        return "\n\n".join(parts) if parts else None
+
+    async def run(self, graph: TaskGraph, execute: TaskExecutor,
+                  token: Optional[CancellationToken] = None) -> ScheduleResult:
+        """Execute every node once all of its dependencies have finished.
+
+        The token is checked before each task starts and while waiting on running
+        tasks; once it fires, running tasks are cancelled and RunCancelledError raised.
+        An optional task that nothing depends on may fail without failing the run.
+        """
+        token = token or CancellationToken()
+        order = graph.topological_order()
+        result = ScheduleResult()
+        global_limit = self.limit or asyncio.Semaphore(self.max_concurrency)
+        started = time.time()
+
+        async def run_node(node: TaskNode) -> None:
+            limit = node.max_concurrency or self.default_task_concurrency
+            task_limit = self._task_limit(node.name, limit) if limit else None
+            # Take the per-task cap first so waiting on it doesn't hold a global slot
+            if task_limit:
+                await self._acquire(task_limit)
+            try:
+                async with global_limit:
+                    token.raise_if_cancelled()
+                    node_started = time.time()
+                    context = self.build_context(graph, node, result.outputs)
+                    try:
+                        result.outputs[node.name] = await execute(node, context)
+                    except Exception as e:
+                        if not node.optional or graph.dependents(node.name) or token.cancelled \
+                                or isinstance(e, RunCancelledError):
+                            raise
+                        result.durations[node.name] = time.time() - node_started
+                        result.failed.append(node.name)
+                        self.report_failure(node, e, token.run_id)
+                        return
+                    result.durations[node.name] = time.time() - node_started
+                    token.stats.tasks_completed += 1
+                    CancellationMetrics.record_task(result.durations[node.name])
+            finally:
+                if task_limit:
+                    task_limit.release()
+
+        pending = {name: set(graph.nodes[name].depends_on) for name in order}
+        running: Dict[asyncio.Task, str] = {}
+        try:
+            while pending or running:
+                ready = [name for name, deps in pending.items() if not deps]
+                for name in ready:
+                    del pending[name]
+                    running[asyncio.ensure_future(run_node(graph.nodes[name]))] = name
+
+                done, _ = await asyncio.wait(
+                    running, timeout=0.5, return_when=asyncio.FIRST_COMPLETED
+                )
+                for finished in done:
+                    name = running.pop(finished)
+                    finished.result()  # Re-raise task failures
+                    for deps in pending.values():
+                        deps.discard(name)
+                if pending or running:
+                    token.raise_if_cancelled()
+        except BaseException as e:
+            unfinished = [task for task in running if not task.done()]
+            for task in unfinished:
+                task.cancel()
+            if not token.cancelled:
+                raise
+            token.stats.tasks_skipped = len(pending) + len(unfinished)
+            # Aborted HTTP requests surface as client errors; report them as the cancellation
+            if isinstance(e, RunCancelledError):
+                raise
+            raise RunCancelledError(token.reason or "cancelled") from e
+
+        result.wall_time = time.time() - started
+        result.critical_path = graph.critical_path(result.durations)
+        result.final_output = graph.merge(result.outputs) if graph.merge else result.outputs[order[-1]]
+        self.report_timing(graph, result, token.run_id)
+        return result
+
+    @staticmethod
+    def report_failure(node: TaskNode, error: Exception, run_id: Optional[str] = None) -> None:
+        """Tell the user which part of the plan is missing and why"""
+        role = node.task.agent.role
+        AsyncActivityEmitter.add_activity(Activity(
+            "Scheduler", f"⚠️ {role} failed, so the plan goes out without it: {str(error)}", "error", run_id=run_id
+        ).to_dict())
+
+    @staticmethod
+    def report_timing(graph: TaskGraph, result: ScheduleResult, run_id: Optional[str] = None) -> None:
+        """Publish critical-path timing to the activity thread"""
+        path = " → ".join(
+            f"{graph.nodes[name].task.agent.role} ({result.durations[name]:.1f}s)"
+            for name in result.critical_path
+        )
+        content = (
+            f"⏱️ Finished in {result.wall_time:.1f}s "
+            f"(sum of task times {result.total_task_time:.1f}s)\n"
+            f"Critical path ({result.critical_path_time:.1f}s): {path}"
+        )
+        AsyncActivityEmitter.add_activity(Activity("Scheduler", content, "info", run_id=run_id).to_dict())
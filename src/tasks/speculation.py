@@ -0,0 +1,247 @@
+# src/tasks/speculation.py
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from .fair_scheduler import FairScheduler, Job, QuotaExceededError
+from ..agents.async_tracked_agent import AsyncActivityEmitter
+from ..state.itinerary_store import ItineraryStore
+from ..state.plan_cache import PlanCache, PlanKey, plan_key
+from ..state.state_manager import TravelPreferences
+from ..utils.cancellation import CancellationToken
+from ..utils.stats import percentile
+
+PlannerRunner = Callable[[TravelPreferences, CancellationToken], str]
+
+@dataclass
+class SpeculativeRun:
+    """A planner stage started from form inputs before the user submitted them"""
+    key: PlanKey
+    preferences: TravelPreferences
+    token: CancellationToken
+    future: Future = field(default_factory=Future)
+    job: Optional[Job] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    adopted: bool = False
+    discarded: bool = False
+
+class SpeculationMetrics:
+    """Process-wide counters of speculative work used and wasted"""
+    _lock = threading.Lock()
+    started = 0
+    adopted = 0
+    discarded = 0
+    tokens_spent = 0
+    tokens_wasted = 0
+    _saved_seconds: List[float] = []
+
+    @classmethod
+    def record_started(cls) -> None:
+        with cls._lock:
+            cls.started += 1
+
+    @classmethod
+    def record_adopted(cls, saved_seconds: float) -> None:
+        with cls._lock:
+            cls.adopted += 1
+            cls._saved_seconds.append(saved_seconds)
+            del cls._saved_seconds[:-1000]
+
+    @classmethod
+    def record_discarded(cls) -> None:
+        with cls._lock:
+            cls.discarded += 1
+
+    @classmethod
+    def record_tokens(cls, tokens: int, wasted: bool) -> None:
+        """Count tokens once when a run finishes, and again as wasted if it is never adopted"""
+        with cls._lock:
+            if not wasted:
+                cls.tokens_spent += tokens
+            else:
+                cls.tokens_wasted += tokens
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, float]:
+        with cls._lock:
+            saved = list(cls._saved_seconds)
+            return {
+                "started": cls.started,
+                "adopted": cls.adopted,
+                "discarded": cls.discarded,
+                "adoption_ratio": round(cls.adopted / cls.started, 3) if cls.started else 0.0,
+                "wasted_work_ratio": round(cls.tokens_wasted / cls.tokens_spent, 3) if cls.tokens_spent else 0.0,
+                "saved_p50": round(percentile(saved, 50), 1),
+                "saved_total": round(sum(saved), 1)
+            }
+
+class SpeculativePlanner:
+    """Runs the planner stage speculatively while the user is still on the form.
+
+    Once a session's inputs have been stable for `debounce_seconds`, the
+    planner task is queued as a preemptible batch job. A submission with the
+    same inputs adopts the run and awaits its result instead of planning
+    again; changed inputs cancel it. Each run may use at most
+    `max_tokens_per_run` tokens until adopted, and all speculation together
+    at most `token_budget_per_hour`.
+    """
+    _instance: Optional["SpeculativePlanner"] = None
+    _instance_lock = threading.Lock()
+    max_submitted = 1000
+
+    def __init__(self, run_planner: PlannerRunner, scheduler: FairScheduler,
+                 debounce_seconds: float = 1.5, max_tokens_per_run: int = 3000,
+                 token_budget_per_hour: int = 20000, max_age: float = 600.0):
+        self.run_planner = run_planner
+        self.scheduler = scheduler
+        self.debounce_seconds = debounce_seconds
+        self.max_tokens_per_run = max_tokens_per_run
+        self.token_budget_per_hour = token_budget_per_hour
+        self.max_age = max_age
+        self._runs: Dict[str, SpeculativeRun] = {}
+        self._pending: Dict[str, Tuple[PlanKey, threading.Timer]] = {}
+        self._submitted: "OrderedDict[str, PlanKey]" = OrderedDict()
+        self._spent: Deque[Tuple[float, int]] = deque()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def start(cls, config, run_planner: PlannerRunner) -> Optional["SpeculativePlanner"]:
+        """Create the process-wide planner once; None unless speculative planning is enabled"""
+        if not config.speculative_planning:
+            return None
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(
+                    run_planner,
+                    FairScheduler.get_instance(config),
+                    debounce_seconds=config.speculative_debounce_seconds,
+                    max_tokens_per_run=config.max_speculative_tokens,
+                    token_budget_per_hour=config.speculative_token_budget_per_hour
+                )
+            return cls._instance
+
+    def tokens_spent_last_hour(self) -> int:
+        cutoff = time.time() - 3600
+        with self._lock:
+            while self._spent and self._spent[0][0] < cutoff:
+                self._spent.popleft()
+            return sum(tokens for _, tokens in self._spent)
+
+    def observe(self, session_id: str, flow_id: str, preferences: TravelPreferences) -> None:
+        """Note the session's current form inputs and (re)start the debounce timer if they changed"""
+        key = plan_key(preferences)
+        if self._submitted.get(session_id) == key or PlanCache.expires_in(key) > 0:
+            return  # Already planned or cached; a submit needs no speculation
+        with self._lock:
+            current = self._runs.get(session_id)
+            if current and current.key == key:
+                return
+            pending = self._pending.get(session_id)
+            if pending and pending[0] == key:
+                return
+            if current:
+                self._discard(self._runs.pop(session_id), "inputs changed")
+            if pending:
+                pending[1].cancel()
+            timer = threading.Timer(self.debounce_seconds, self._start_run,
+                                    args=(session_id, flow_id, preferences, key))
+            timer.daemon = True
+            self._pending[session_id] = (key, timer)
+        timer.start()
+
+    def discard(self, session_id: str, reason: str) -> None:
+        """Cancel the session's pending or running speculation"""
+        with self._lock:
+            self._submitted.pop(session_id, None)
+            pending = self._pending.pop(session_id, None)
+            if pending:
+                pending[1].cancel()
+            run = self._runs.pop(session_id, None)
+            if run:
+                self._discard(run, reason)
+
+    def adopt(self, session_id: str, preferences: TravelPreferences) -> Optional[SpeculativeRun]:
+        """Hand the session's speculative run to a submission with the same inputs"""
+        key = plan_key(preferences)
+        with self._lock:
+            self._submitted[session_id] = key
+            self._submitted.move_to_end(session_id)
+            while len(self._submitted) > self.max_submitted:
+                self._submitted.popitem(last=False)  # Sessions that closed after submitting
+            pending = self._pending.pop(session_id, None)
+            if pending:
+                pending[1].cancel()
+            run = self._runs.pop(session_id, None)
+            if run is None:
+                return None
+            failed = run.future.done() and run.future.exception() is not None
+            if run.key != key or run.token.cancelled or failed or run.job is None \
+                    or run.job.started_at is None or time.time() - run.created_at > self.max_age \
+                    or not self.scheduler.promote(run.job.job_id):  # No longer preemptible once promoted
+                # A still-queued run would wait behind interactive ones; plan from scratch instead
+                self._discard(run, "not adoptable")
+                return None
+            run.adopted = True
+            run.token.token_limit = None
+            SpeculationMetrics.record_adopted((run.finished_at or time.time()) - run.job.started_at)
+            return run
+
+    def _start_run(self, session_id: str, flow_id: str, preferences: TravelPreferences, key: PlanKey) -> None:
+        with self._lock:
+            pending = self._pending.get(session_id)
+            if pending is None or pending[0] != key:
+                return
+            del self._pending[session_id]
+            self._expire_old_runs()
+        if self.tokens_spent_last_hour() + self.max_tokens_per_run > self.token_budget_per_hour:
+            return
+
+        token = CancellationToken(token_limit=self.max_tokens_per_run)
+        run = SpeculativeRun(key=key, preferences=preferences, token=token)
+        with self._lock:
+            if session_id in self._pending or session_id in self._runs:
+                return  # Inputs changed again while this one was being set up
+            ItineraryStore.start_run(token.run_id, None)
+            try:
+                run.job = self.scheduler.submit(
+                    flow_id=f"{flow_id}:speculative", fn=lambda: self._execute(run),
+                    token=token, priority="batch", job_id=f"spec-{token.run_id}"
+                )
+            except QuotaExceededError:
+                return
+            self._runs[session_id] = run
+        SpeculationMetrics.record_started()
+
+    def _execute(self, run: SpeculativeRun) -> None:
+        if not run.future.set_running_or_notify_cancel():
+            return  # Cancelled by a consumer before it started
+        try:
+            run.future.set_result(self.run_planner(run.preferences, run.token))
+        except Exception as e:
+            run.future.set_exception(e)
+        finally:
+            tokens = run.token.stats.tokens_used
+            with self._lock:
+                run.finished_at = time.time()
+                self._spent.append((run.finished_at, tokens))
+                SpeculationMetrics.record_tokens(tokens, wasted=False)
+                if run.discarded:
+                    SpeculationMetrics.record_tokens(tokens, wasted=True)
+
+    def _discard(self, run: SpeculativeRun, reason: str) -> None:
+        run.discarded = True
+        run.token.cancel(reason)
+        if run.finished_at is not None:
+            SpeculationMetrics.record_tokens(run.token.stats.tokens_used, wasted=True)
+        AsyncActivityEmitter.discard_run(run.token.run_id)
+        SpeculationMetrics.record_discarded()
+
+    def _expire_old_runs(self) -> None:
+        # Sessions that closed without submitting never call adopt or discard
+        now = time.time()
+        for session_id, run in list(self._runs.items()):
+            if now - run.created_at > self.max_age:
+                self._discard(self._runs.pop(session_id), "expired")
@@ -0,0 +1,68 @@
+# src/tasks/task_graph.py
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+from crewai import Task
+
+@dataclass
+class TaskNode:
+    """A task plus the names of the tasks whose output it needs"""
+    name: str
+    task: Task
+    depends_on: List[str] = field(default_factory=list)
+    max_concurrency: Optional[int] = None
+    context: Optional[str] = None  # Given to the task ahead of its dependencies' outputs
+    optional: bool = False  # If nothing depends on it, a failure leaves its output out instead of failing the run
+
+@dataclass
+class TaskGraph:
+    """Dependency graph of tasks with a merge stage that assembles the final result"""
+    nodes: Dict[str, TaskNode] = field(default_factory=dict)
+    merge: Optional[Callable[[Dict[str, str]], str]] = None
+
+    def add(self, node: TaskNode) -> TaskNode:
+        if node.name in self.nodes:
+            raise ValueError(f"Duplicate task name: {node.name}")
+        self.nodes[node.name] = node
+        return node
+
+    def dependents(self, name: str) -> List[str]:
+        return [n.name for n in self.nodes.values() if name in n.depends_on]
+
+    def topological_order(self) -> List[str]:
+        """Return task names in dependency order, raising ValueError on bad graphs"""
+        for node in self.nodes.values():
+            missing = [dep for dep in node.depends_on if dep not in self.nodes]
+            if missing:
+                raise ValueError(f"Task '{node.name}' depends on unknown tasks: {', '.join(missing)}")
+
+        remaining = {name: set(node.depends_on) for name, node in self.nodes.items()}
+        order = []
+        while remaining:
+            ready = sorted(name for name, deps in remaining.items() if not deps)
+            if not ready:
+                raise ValueError(f"Cycle detected between tasks: {', '.join(sorted(remaining))}")
+            for name in ready:
+                order.append(name)
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return order
+
+    def critical_path(self, durations: Dict[str, float]) -> List[str]:
+        """Longest chain of dependent tasks given each task's measured duration"""
+        finish: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+        for name in self.topological_order():
+            deps = self.nodes[name].depends_on
+            slowest = max(deps, key=lambda d: finish[d]) if deps else None
+            previous[name] = slowest
+            finish[name] = (finish[slowest] if slowest else 0.0) + durations.get(name, 0.0)
+
+        if not finish:
+            return []
+        path = []
+        current: Optional[str] = max(finish, key=finish.get)
+        while current:
+            path.append(current)
+            current = previous[current]
+        return list(reversed(path))
@@ -1,6 +1,10 @@
 # src/tasks/travel_tasks.py
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 from crewai import Task, Agent
+from .prompt_layout import TASK_INSTRUCTIONS, trip_request
+from .task_graph import TaskGraph, TaskNode
+
+SPECIALIST_TASKS = ('local_expert', 'budget_analyst', 'food_guide', 'transport_planner')
 
 class TravelTaskManager:
     @staticmethod
@@ -28,6 +32,62 @@ class TravelTaskManager:
         ]
         return tasks
 
+    @staticmethod
+    def create_planner_task(agent: Agent) -> Task:
+        """The first stage of every plan, also run on its own for speculative planning"""
+        description, expected_output = TASK_INSTRUCTIONS['travel_planner']
+        return Task(description=description, expected_output=expected_output, agent=agent)
+
+    @staticmethod
+    def create_travel_task_graph(
+        agents: Dict[str, Agent],
+        destination: str,
+        duration: int,
+        budget: str,
+        interests: List[str],
+        task_concurrency: Optional[int] = None
+    ) -> TaskGraph:
+        """Build the planning DAG: planner first, then specialists in parallel, then a merge.
+
+        Task descriptions are static; each task gets the trip request fields
+        it uses as context, so prompts share the longest possible prefix.
+        """
+        graph = TaskGraph(merge=TravelTaskManager.merge_results)
+        graph.add(TaskNode(
+            name='travel_planner',
+            task=TravelTaskManager.create_planner_task(agents['travel_planner']),
+            max_concurrency=task_concurrency,
+            context=trip_request(destination, duration, budget, interests)
+        ))
+
+        for name in SPECIALIST_TASKS:
+            if name not in agents:
+                continue
+            description, expected_output = TASK_INSTRUCTIONS[name]
+            graph.add(TaskNode(
+                name=name,
+                task=Task(description=description, expected_output=expected_output, agent=agents[name]),
+                depends_on=['travel_planner'],
+                max_concurrency=task_concurrency,
+                context=trip_request(destination, duration, budget, interests, task=name),
+                optional=True  # merge_results leaves out the sections of failed specialists
+            ))
+        return graph
+
+    @staticmethod
+    def merge_results(outputs: Dict[str, str]) -> str:
+        """Assemble the final plan from the enhanced itinerary and the specialist notes"""
+        sections = [outputs.get('local_expert') or outputs['travel_planner']]
+        headings = {
+            'budget_analyst': "## Budget",
+            'food_guide': "## Where to Eat",
+            'transport_planner': "## Getting Around"
+        }
+        for name, heading in headings.items():
+            if outputs.get(name):
+                sections.append(f"{heading}\n\n{outputs[name]}")
+        return "\n\n".join(sections)
+
     @staticmethod
     def create_custom_task(agent: Agent, description: str, expected_output: str) -> Task:
         return Task(
@@ -3,12 +3,22 @@ from src.ui.components.main import (
     render_travel_form,
     render_activities,
     render_final_plan,
-    render_feedback
+    render_feedback,
+    render_itinerary_days,
+    render_comparison_table,
+    render_queue_status,
+    render_debug_metrics,
+    render_profiler_controls
 )
 
 __all__ = [
     'render_travel_form',
     'render_activities', 
     'render_final_plan',
-    'render_feedback'
+    'render_feedback',
+    'render_itinerary_days',
+    'render_comparison_table',
+    'render_queue_status',
+    'render_debug_metrics',
+    'render_profiler_controls'
 ]
\ No newline at end of file
@@ -3,6 +3,7 @@ import streamlit as st
 from typing import List, Dict, Any
 import time
 from src.agents.async_tracked_agent import AsyncActivityEmitter
+from src.ui.session import rerun_for_updates
 
 def render_activity_thread() -> None:
     """Render the agent activities thread.
@@ -15,25 +16,48 @@ def render_activity_thread() -> None:
      # Update activities from queue
     update_activities()
     
-    # Create a container for activities
-    activities_container = st.empty()
-    
     # Sort activities by timestamp
     sorted_activities = sorted(
         st.session_state.agent_activities,
         key=lambda x: x.get("timestamp", 0)
     )
 
-    # Render in container for efficient updates
-    with activities_container.container():
-        for activity in sorted_activities:
-            with st.chat_message(activity["agent"].lower()):
-                display_activity(activity)
+    # Rendered directly: each rerun redraws the thread anyway, and Streamlit 1.28's
+    # AppTest (used by src/loadtest) can't parse st.container blocks
+    for activity in sorted_activities:
+        with st.chat_message(activity["agent"].lower()):
+            display_activity(activity)
     
     # Auto-refresh while processing
     if st.session_state.get('processing', False):
         time.sleep(0.1)  # Small delay to prevent too frequent updates
-        st.rerun()
+        rerun_for_updates()
+
+def render_comparison_thread(comparison: Dict[str, Any]) -> None:
+    """Render one activity column per destination of a comparison run."""
+    st.subheader("Agent Chat Thread")
+
+    # Scheduler messages about the comparison as a whole
+    update_activities()
+    for activity in st.session_state.agent_activities:
+        display_activity(activity)
+
+    columns = st.columns(len(comparison["run_ids"]))
+    for column, (destination, run_id) in zip(columns, comparison["run_ids"].items()):
+        activities = comparison["activities"].setdefault(run_id, [])
+        activities.extend(AsyncActivityEmitter.get_pending_activities(run_id))
+        with column:
+            st.markdown(f"### {destination}")
+            result = comparison["results"].get(destination)
+            if result:
+                st.caption(f"{result.status} in {result.duration:.0f}s")
+            for activity in sorted(activities, key=lambda x: x.get("timestamp", 0)):
+                with st.chat_message(activity["agent"].lower()):
+                    display_activity(activity)
+
+    if st.session_state.get('processing', False):
+        time.sleep(0.1)
+        rerun_for_updates()
 
 def update_activities():
     """Update activities from the queue to session state"""
@@ -41,7 +65,9 @@ def update_activities():
         st.session_state.agent_activities = []
         
     # Get pending activities from the queue
-    new_activities = AsyncActivityEmitter.get_pending_activities()
+    new_activities = AsyncActivityEmitter.get_pending_activities(
+        st.session_state.get('current_run_id')
+    )
     if new_activities:
         st.session_state.agent_activities.extend(new_activities)
 
@@ -59,4 +85,7 @@ def display_activity(activity: Dict[str, Any]):
         else:
             st.write(activity["content"])
     else:
-        st.write(activity["content"])
\ No newline at end of file
+        st.write(activity["content"])
+
+    if activity.get("metadata"):
+        st.caption(" · ".join(f"{key}: {value}" for key, value in activity["metadata"].items()))
\ No newline at end of file
@@ -1,15 +1,33 @@
 # src/ui/components/main.py
 import streamlit as st
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import os
 import time
+from contextlib import nullcontext
 import streamlit as st
 from typing import Tuple, List
-from src.ui.components.activity_thread import render_activity_thread
+from src.ui.components.activity_thread import render_activity_thread, render_comparison_thread
+from src.state.itinerary_store import ItineraryStore
+from src.agents.endpoint_pool import EndpointPool
+from src.agents.usage_tracking import PromptCacheStats
+from src.state.plan_cache import PlanCache
+from src.tasks.plan_warmer import PlanWarmer
+from src.tasks.speculation import SpeculationMetrics, SpeculativePlanner
+from src.utils.cancellation import CancellationMetrics
+from src.utils.profiler import measure_disabled_overhead
 
-def render_travel_form() -> Tuple[bool, str, int, str, List[str]]:
-    """Render the travel preferences form."""
-    with st.form("travel_preferences"):
-        destination = st.text_input("Destination", key="destination_input")
+def render_travel_form(speculative: bool = False) -> Tuple[bool, str, int, str, List[str]]:
+    """Render the travel preferences form.
+
+    In speculative mode the inputs are not batched in an st.form, so every
+    change reaches the app before the user submits.
+    """
+    with nullcontext() if speculative else st.form("travel_preferences"):
+        destination = st.text_input(
+            "Destination",
+            key="destination_input",
+            help="Separate 2-4 destinations with 'vs', 'or' or ';' to compare them side by side"
+        )
         duration = st.number_input("Duration (days)", min_value=1, max_value=30, key="duration_input")
         budget = st.selectbox("Budget", ["Budget", "Moderate", "Luxury"], key="budget_input")
         interests = st.multiselect(
@@ -20,7 +38,7 @@ def render_travel_form() -> Tuple[bool, str, int, str, List[str]]:
         
         col1, col2 = st.columns(2)
         with col1:
-            submitted = st.form_submit_button("Plan My Trip")
+            submitted = st.button("Plan My Trip") if speculative else st.form_submit_button("Plan My Trip")
         with col2:
             async_mode = st.checkbox("Enable real-time updates", 
                                    value=st.session_state.get('async_mode', False),
@@ -36,11 +54,54 @@ def render_travel_form() -> Tuple[bool, str, int, str, List[str]]:
 
 
 def render_activities():
-    """Render the agent activities thread."""
+    """Render the agent activities thread, one column per destination when comparing."""
     if 'agent_activities' not in st.session_state:
         st.session_state.agent_activities = []
     
-    render_activity_thread()
+    if st.session_state.get('comparison'):
+        render_comparison_thread(st.session_state.comparison)
+    else:
+        render_activity_thread()
+
+def render_queue_status(status: Optional[Dict[str, Any]]):
+    """Render the queue position and estimated wait of a run that hasn't started yet."""
+    if not status or status["state"] != "queued":
+        return
+    eta = f", starting in about {status['eta']:.0f}s" if status["eta"] else ""
+    st.info(f"⏳ Your plan is number {status['position']} in the queue{eta}.")
+
+def render_itinerary_days():
+    """Render each completed day of the current run as soon as it has been parsed."""
+    run_id = st.session_state.get('current_run_id')
+    if not run_id or (st.session_state.get('messages') and not st.session_state.get('processing', False)):
+        return
+    days = ItineraryStore.get_days(run_id)
+    if not days:
+        return
+
+    st.subheader("Itinerary so far")
+    first_day_latency = ItineraryStore.first_day_latency(run_id)
+    if first_day_latency is not None:
+        st.metric("Time to first complete day", f"{first_day_latency:.1f}s")
+    for day in days:
+        heading = f"Day {day['day']}: {day['title']}" if day['title'] else f"Day {day['day']}"
+        with st.expander(heading, expanded=True):
+            st.markdown(day['content'])
+            details = []
+            if day['places']:
+                details.append("📍 " + ", ".join(day['places']))
+            if day['costs']:
+                details.append("💰 " + ", ".join(day['costs']))
+            details.append(f"from {day['source']}")
+            st.caption(" · ".join(details))
+
+def render_comparison_table():
+    """Render the side-by-side summary once every destination of a comparison has finished."""
+    comparison = st.session_state.get('comparison')
+    if not comparison or len(comparison["results"]) < len(comparison["run_ids"]):
+        return
+    st.subheader("Destination comparison")
+    st.table([comparison["results"][name].to_row() for name in comparison["run_ids"]])
 
 def render_final_plan():
     """Render the final travel plan."""
@@ -75,4 +136,74 @@ def render_feedback():
                 st.session_state.feedback.append({
                     "rating": rating,
                     "comment": feedback
-                })
\ No newline at end of file
+                })
+
+def render_debug_metrics():
+    """Render run metrics in the sidebar (debug mode only)."""
+    with st.sidebar:
+        st.subheader("Cancellation")
+        metrics = CancellationMetrics.snapshot()
+        st.metric("Cancelled runs", metrics["cancelled_runs"])
+        st.metric("Wasted tokens", metrics["wasted_tokens"])
+        st.metric("Tasks skipped", metrics["tasks_skipped"])
+        st.metric("Worker time reclaimed (s)", metrics["reclaimed_seconds"])
+
+        st.subheader("Itinerary latency")
+        first_day = ItineraryStore.first_day_latency_summary()
+        st.metric("Time to first day p50 (s)", first_day["p50"])
+        st.metric("Time to first day p95 (s)", first_day["p95"])
+
+        st.subheader("Plan cache")
+        cache = PlanCache.snapshot()
+        st.metric("Hit ratio", cache["hit_ratio"])
+        st.metric("Warm hit ratio", cache["warm_hit_ratio"])
+        st.metric("Peak tokens saved", cache["peak_tokens_saved"])
+        st.metric("Peak load reduction", f"{cache['peak_load_reduction']:.0%}")
+        warmer = PlanWarmer._instance
+        if warmer:
+            st.caption(f"Warmed {warmer.warmed} plans, {warmer.preempted} preempted, "
+                       f"{warmer.tokens_spent_last_hour()}/{warmer.token_budget_per_hour} tokens this hour")
+
+        if SpeculativePlanner._instance:
+            st.subheader("Speculative planning")
+            speculation = SpeculationMetrics.snapshot()
+            st.metric("Adopted runs", f"{speculation['adopted']} of {speculation['started']}")
+            st.metric("Planner time saved p50 (s)", speculation["saved_p50"])
+            st.metric("Wasted work", f"{speculation['wasted_work_ratio']:.0%}")
+
+        pool = EndpointPool._instance
+        if pool:
+            st.subheader("LLM endpoints")
+            endpoints = pool.snapshot()
+            st.metric("Hedged requests", f"{endpoints['hedged']} of {endpoints['requests']}")
+            for endpoint in endpoints["endpoints"]:
+                state = "up" if endpoint["available"] else "ejected"
+                st.caption(f"{endpoint['base_url']} ({state}): {endpoint['outstanding']} in flight, "
+                           f"p50 {endpoint['p50_latency']}s, {endpoint['ejections']} ejections")
+
+        usage = PromptCacheStats.snapshot()
+        if usage["requests"]:
+            st.subheader("Prompt cache")
+            st.metric("Cached prompt tokens", f"{usage['cached_token_ratio']:.0%}")
+            st.caption(f"{usage['cache_hits']} of {usage['requests']} requests hit the cache, "
+                       f"{usage['cached_tokens']} of {usage['prompt_tokens']} prompt tokens")
+            st.caption(f"Time to first byte p50: {usage['ttfb_p50_cached']}s cached, "
+                       f"{usage['ttfb_p50_uncached']}s uncached")
+
+def render_profiler_controls():
+    """Render the profiling toggle and profile downloads in the sidebar (debug mode only)."""
+    with st.sidebar:
+        st.subheader("Profiling")
+        st.checkbox("Profile next run", key="profile_next_run")
+        st.caption(f"Overhead when not profiling: {measure_disabled_overhead():.0f} ns per check")
+
+        paths = st.session_state.get('profile_paths')
+        if paths:
+            with open(paths["speedscope"], 'rb') as f:
+                st.download_button("Download speedscope profile", f.read(),
+                                   file_name=os.path.basename(paths["speedscope"]),
+                                   mime="application/json")
+            with open(paths["folded"], 'rb') as f:
+                st.download_button("Download flame graph stacks", f.read(),
+                                   file_name=os.path.basename(paths["folded"]),
+                                   mime="text/plain")
@@ -7,4 +7,55 @@ def initialize_session_state():
     if 'messages' not in st.session_state:
         st.session_state.messages: List[Dict[str, str]] = []
     if 'agent_activities' not in st.session_state:
-        st.session_state.agent_activities: List[Dict[str, Any]] = []
\ No newline at end of file
+        st.session_state.agent_activities: List[Dict[str, Any]] = []
+
+# Session state keys the load simulator sets, since Streamlit's test harness gives
+# every session the same session id and user email
+SIMULATED_SESSION_KEY = "simulated_session_id"
+SIMULATED_USER_KEY = "simulated_user_id"
+
+def get_session_id() -> str:
+    """Return the id of the Streamlit session running the current script."""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return "default"
+    return st.session_state.get(SIMULATED_SESSION_KEY) or ctx.session_id
+
+def rerun_for_updates() -> None:
+    """st.rerun() for auto-refresh, without replaying this run's button clicks.
+
+    A rerun from the browser resets button triggers first, but st.rerun()
+    doesn't, so a clicked submit button would read True on every refresh and
+    restart the plan each time. A click that arrives meanwhile is applied
+    after this reset, so it still counts.
+    """
+    from streamlit.proto.WidgetStates_pb2 import WidgetStates
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        ctx.session_state.on_script_will_rerun(WidgetStates())
+    st.rerun()
+
+def is_session_active(session_id: str) -> bool:
+    """Check whether a browser is still connected to the given session."""
+    from streamlit import runtime
+    if not runtime.exists():
+        return True
+    return runtime.get_instance().is_active_session(session_id)
+
+# Emails some Streamlit versions report for every visitor when the app runs locally or under test
+PLACEHOLDER_EMAILS = {"test@example.com", "test@localhost.com", "test@test.com"}
+
+def get_user_id() -> str:
+    """Return the signed-in user's email when available, else the session id."""
+    if st.session_state.get(SIMULATED_USER_KEY):
+        return st.session_state[SIMULATED_USER_KEY]
+    try:
+        email = st.experimental_user.get("email")
+    except Exception:
+        email = None
+    if not email or "@" not in email or email.lower() in PLACEHOLDER_EMAILS:
+        # Without a real identity, each session is its own flow
+        return get_session_id()
+    return email
@@ -0,0 +1,228 @@
+# src/utils/cancellation.py
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+from .error_handler import TravelPlannerError, logger
+
+class RunCancelledError(TravelPlannerError):
+    """Raised inside a plan run once its cancellation token has fired"""
+    def __init__(self, reason: str):
+        super().__init__(f"Run cancelled: {reason}")
+        self.reason = reason
+
+@dataclass
+class RunStats:
+    """Work done by a single run, used to report what cancellation saved"""
+    started_at: float = field(default_factory=time.time)
+    tokens_streamed: int = 0
+    prompt_tokens: int = 0  # As reported by the backend, see UsageTrackingTransport
+    completion_tokens: int = 0
+    tasks_completed: int = 0
+    tasks_skipped: int = 0
+
+    @property
+    def tokens_used(self) -> int:
+        """Prompt plus completion tokens; streamed tokens cover calls aborted before reporting usage"""
+        return self.prompt_tokens + max(self.completion_tokens, self.tokens_streamed)
+
+@dataclass
+class RunOutcome:
+    """How a run ended and the messages it produced, for the session that started it"""
+    status: str  # "done", "cancelled" or "failed"
+    messages: List[str] = field(default_factory=list)
+    finished_at: float = field(default_factory=time.time)
+
+class CancellationToken:
+    """Cooperative cancellation flag with an optional deadline and token limit"""
+
+    def __init__(self, deadline_seconds: Optional[float] = None, run_id: Optional[str] = None,
+                 token_limit: Optional[int] = None):
+        self.run_id = run_id or uuid.uuid4().hex[:8]
+        self.deadline = time.time() + deadline_seconds if deadline_seconds else None
+        self.token_limit = token_limit
+        self.reason: Optional[str] = None
+        self.stats = RunStats()
+        self.parent: Optional["CancellationToken"] = None
+        self._event = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        if not self._event.is_set():
+            if self.parent is not None and self.parent.cancelled:
+                self.cancel(self.parent.reason or "cancelled")
+            elif self.deadline and time.time() >= self.deadline:
+                self.cancel("deadline exceeded")
+            elif self.token_limit is not None and self.stats.tokens_used > self.token_limit:
+                self.cancel("token limit reached")
+        return self._event.is_set()
+
+    @property
+    def abandoned(self) -> bool:
+        """Cancelled on its own while the parent run goes on, e.g. a timed-out attempt"""
+        return self.parent is not None and self._event.is_set() and not self.parent.cancelled
+
+    def child(self) -> "CancellationToken":
+        """Token for part of this run that can be cancelled on its own; shares the run's id and stats"""
+        child = CancellationToken(run_id=self.run_id)
+        child.parent = self
+        child.stats = self.stats
+        self.on_cancel(lambda: child.cancel(self.reason or "cancelled"))
+        return child
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, or None when there is no deadline"""
+        return max(0.0, self.deadline - time.time()) if self.deadline else None
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        """Fire the token and run registered callbacks once"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Error in cancellation callback: {str(e)}")
+
+    def on_cancel(self, callback: Callable[[], None]) -> None:
+        """Register a callback, e.g. closing an HTTP client to abort in-flight requests"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise RunCancelledError(self.reason or "cancelled")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._event.wait(timeout)
+
+class CancellationMetrics:
+    """Process-wide counters of work lost to and saved by cancellation"""
+    _lock = threading.Lock()
+    cancelled_runs = 0
+    wasted_tokens = 0
+    tasks_skipped = 0
+    reclaimed_seconds = 0.0
+    _task_seconds = 0.0
+    _task_count = 0
+
+    @classmethod
+    def record_task(cls, seconds: float) -> None:
+        with cls._lock:
+            cls._task_seconds += seconds
+            cls._task_count += 1
+
+    @classmethod
+    def average_task_seconds(cls) -> float:
+        with cls._lock:
+            return cls._task_seconds / cls._task_count if cls._task_count else 0.0
+
+    @classmethod
+    def record_cancelled(cls, stats: RunStats) -> float:
+        """Record a cancelled run and return the worker time it freed"""
+        reclaimed = stats.tasks_skipped * cls.average_task_seconds()
+        with cls._lock:
+            cls.cancelled_runs += 1
+            cls.wasted_tokens += stats.tokens_streamed
+            cls.tasks_skipped += stats.tasks_skipped
+            cls.reclaimed_seconds += reclaimed
+        return reclaimed
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, float]:
+        with cls._lock:
+            return {
+                "cancelled_runs": cls.cancelled_runs,
+                "wasted_tokens": cls.wasted_tokens,
+                "tasks_skipped": cls.tasks_skipped,
+                "reclaimed_seconds": round(cls.reclaimed_seconds, 1)
+            }
+
+class RunRegistry:
+    """Tracks the active run of each session so it can be superseded or abandoned"""
+    _lock = threading.Lock()
+    _runs: Dict[str, CancellationToken] = {}
+    _outcomes: "OrderedDict[str, RunOutcome]" = OrderedDict()
+    max_outcomes = 1000
+    _watchdog: Optional[threading.Thread] = None
+    _is_session_active: Optional[Callable[[str], bool]] = None
+
+    @classmethod
+    def start_run(cls, session_id: str, deadline_seconds: Optional[float] = None,
+                  run_id: Optional[str] = None) -> CancellationToken:
+        """Register a new run for the session, cancelling any predecessor"""
+        token = CancellationToken(deadline_seconds, run_id)
+        with cls._lock:
+            previous = cls._runs.get(session_id)
+            cls._runs[session_id] = token
+        if previous:
+            previous.cancel("superseded by a new submission")
+        return token
+
+    @classmethod
+    def finish_run(cls, session_id: str, token: CancellationToken, status: str = "done",
+                   messages: Optional[List[str]] = None) -> None:
+        """Unregister a run and record its outcome and final messages.
+
+        Worker threads can't write session state, so the session's script
+        thread picks the outcome up with pop_outcome on its next rerun; keyed
+        by run id, a plan only ever reaches the session that asked for it.
+        """
+        with cls._lock:
+            if cls._runs.get(session_id) is token:
+                del cls._runs[session_id]
+            cls._outcomes[token.run_id] = RunOutcome(status, list(messages or []))
+            while len(cls._outcomes) > cls.max_outcomes:
+                cls._outcomes.popitem(last=False)
+
+    @classmethod
+    def pop_outcome(cls, run_id: str) -> Optional[RunOutcome]:
+        with cls._lock:
+            return cls._outcomes.pop(run_id, None)
+
+    @classmethod
+    def pending_outcomes(cls) -> int:
+        """Finished runs whose session hasn't collected them yet"""
+        with cls._lock:
+            return len(cls._outcomes)
+
+    @classmethod
+    def cancel_session(cls, session_id: str, reason: str = "session closed") -> None:
+        with cls._lock:
+            token = cls._runs.pop(session_id, None)
+        if token:
+            token.cancel(reason)
+
+    @classmethod
+    def start_watchdog(cls, is_session_active: Callable[[str], bool], interval: float = 2.0) -> None:
+        """Cancel runs whose session has disconnected, polling every `interval` seconds"""
+        with cls._lock:
+            cls._is_session_active = is_session_active
+            if cls._watchdog is not None and cls._watchdog.is_alive():
+                return
+            cls._watchdog = threading.Thread(target=cls._watch, args=(interval,), daemon=True)
+            cls._watchdog.start()
+
+    @classmethod
+    def _watch(cls, interval: float) -> None:
+        while True:
+            time.sleep(interval)
+            with cls._lock:
+                session_ids = list(cls._runs)
+            for session_id in session_ids:
+                try:
+                    if not cls._is_session_active(session_id):
+                        cls.cancel_session(session_id)
+                except Exception as e:
+                    logger.error(f"Error checking session {session_id}: {str(e)}")
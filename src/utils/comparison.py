@@ -0,0 +1,73 @@
+# src/utils/comparison.py
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+# Commas and slashes appear inside names ("Paris, France", "Minneapolis/St. Paul"), so only words and ';' split
+DESTINATION_SEPARATOR = re.compile(r"\s*(?:;|\bvs\b\.?|\bor\b)\s*", re.IGNORECASE)
+AMOUNT = re.compile(r"\d[\d,]*(?:\.\d+)?")
+CURRENCY = re.compile(r"[$€£¥]|USD|EUR|GBP|JPY|VND|THB", re.IGNORECASE)
+
+def parse_destinations(value: str, limit: int = 4) -> Tuple[List[str], List[str]]:
+    """Split 'Lisbon vs Porto; Madrid' into distinct destinations.
+
+    Returns the first `limit` destinations and, separately, the ones dropped
+    beyond it so the caller can tell the user.
+    """
+    destinations: List[str] = []
+    for part in DESTINATION_SEPARATOR.split(value or ""):
+        name = " ".join(part.split())
+        if name and name.lower() not in (d.lower() for d in destinations):
+            destinations.append(name)
+    return destinations[:limit], destinations[limit:]
+
+def estimate_total_cost(costs: List[str]) -> Optional[str]:
+    """Sum cost mentions like '$20' or '€10-15' per currency (ranges count at their midpoint).
+
+    Amounts without a currency count towards the itinerary's currency when
+    it uses only one; totals in different currencies are listed separately.
+    """
+    totals: Dict[Optional[str], float] = {}
+    for cost in costs:
+        amounts = [float(a.replace(',', '')) for a in AMOUNT.findall(cost)]
+        if not amounts:
+            continue
+        match = CURRENCY.search(cost)
+        currency = match.group(0).upper() if match else None
+        totals[currency] = totals.get(currency, 0.0) + sum(amounts) / len(amounts)
+    if None in totals and len(totals) == 2:
+        unpriced = totals.pop(None)
+        currency = next(iter(totals))
+        totals[currency] += unpriced
+    parts = [_format_amount(total, currency) for currency, total in totals.items() if total]
+    return "≈ " + " + ".join(parts) if parts else None
+
+def _format_amount(total: float, currency: Optional[str]) -> str:
+    if currency in (None, '$', '€', '£', '¥'):
+        return f"{currency or ''}{total:,.0f}"
+    return f"{total:,.0f} {currency}"
+
+@dataclass
+class DestinationResult:
+    """Outcome of planning one destination of a comparison"""
+    destination: str
+    run_id: str
+    status: str  # "done", "cached", "failed" or "cancelled"
+    plan: str = ""
+    duration: float = 0.0
+    days: List[Dict[str, Any]] = field(default_factory=list)
+    first_day_latency: Optional[float] = None
+    error: Optional[str] = None
+
+    def to_row(self) -> Dict[str, Any]:
+        costs = [cost for day in self.days for cost in day.get('costs', [])]
+        places = {place for day in self.days for place in day.get('places', [])}
+        return {
+            "Destination": self.destination,
+            "Status": self.status if not self.error else f"{self.status}: {self.error}",
+            "Days planned": len(self.days),
+            "Places": len(places),
+            "Estimated cost": estimate_total_cost(costs) or "–",
+            "Planning time (s)": round(self.duration, 1),
+            "First day (s)": round(self.first_day_latency, 1) if self.first_day_latency is not None else "–"
+        }
@@ -0,0 +1,146 @@
+# src/utils/itinerary_parser.py
+import re
+from typing import List, Optional
+from ..models.itinerary import DayPlan
+
+# "## Day 1", "**Day 1:** Arrival" or "Day 1 - Arrival", but not prose such as "Day 1 of your trip is great":
+# without a heading or bold marker, the number must be followed by a separator or end the line
+DAY_HEADER = re.compile(
+    r"^\s*(?P<heading>#+\s*)?(?P<bold>\*\*)?\s*Day\s+(?P<day>\d+)\s*(?:\*\*)?\s*"
+    r"(?:[:\-–—]\s*(?P<title>.*?)|(?(heading)(?P<heading_title>.*?)|(?(bold)(?P<bold_title>.*?)|)))"
+    r"\s*(?:\*\*)?\s*$",
+    re.IGNORECASE
+)
+COST = re.compile(
+    r"(?:[$€£¥]\s?\d[\d,]*(?:\.\d+)?(?:\s?-\s?[$€£¥]?\s?\d[\d,]*(?:\.\d+)?)?"
+    r"|\d[\d,]*(?:\.\d+)?\s?(?:USD|EUR|GBP|JPY|VND|THB|dollars|euros))",
+    re.IGNORECASE
+)
+HEADING = re.compile(r"^\s*(#+)\s+\S")
+BOLD = re.compile(r"\*\*([^*]{2,80})\*\*")
+BULLET = re.compile(r"^\s*(?:[-*•]|\d+\.)\s+(.*)$")
+TIME_OF_DAY = re.compile(r"^(?:morning|afternoon|evening|night|lunch|dinner|breakfast)\b[:\s]*", re.IGNORECASE)
+LEAD_VERB = re.compile(r"^(?:visit|explore|see|tour|go to|head to|stroll through|at)\s+", re.IGNORECASE)
+# Bold or bulleted labels that structure a day rather than name a place
+SECTION_LABEL = re.compile(
+    r"^(?:(?:early|late|mid)[- ]?)?(?:morning|afternoon|evening|night|breakfast|brunch|lunch|dinner)$"
+    r"|^(?:tips?|notes?|transport(?:ation)?|getting around|accommodation|budget|costs?|overview|"
+    r"highlights?|day \d+)$",
+    re.IGNORECASE
+)
+ARTICLE = re.compile(r"^(?:the|a|an)\s+", re.IGNORECASE)
+
+class ItineraryStreamParser:
+    """Turns streamed agent output into DayPlan objects as soon as each day is complete.
+
+    Text is consumed in arbitrary chunks; complete lines are examined for
+    "Day N" headers. A day is complete when the next day header arrives or
+    the stream finishes. When `start_marker` is set, everything before it
+    (e.g. the agent's reasoning) is ignored.
+    """
+
+    def __init__(self, source: str = "", start_marker: Optional[str] = "Final Answer:"):
+        self.source = source
+        self.start_marker = start_marker
+        self._started = start_marker is None
+        self._pending = ""
+        self._day: Optional[int] = None
+        self._title = ""
+        self._level = 0
+        self._lines: List[str] = []
+
+    def feed(self, text: str) -> List[DayPlan]:
+        """Consume a chunk of output and return the days it completed"""
+        self._pending += text
+        if not self._started:
+            index = self._pending.find(self.start_marker)
+            if index < 0:
+                # Keep just enough text to match a marker split across chunks
+                self._pending = self._pending[-len(self.start_marker):]
+                return []
+            self._started = True
+            self._pending = self._pending[index + len(self.start_marker):]
+
+        completed = []
+        *lines, self._pending = self._pending.split("\n")
+        for line in lines:
+            day = self._consume_line(line)
+            if day:
+                completed.append(day)
+        return completed
+
+    def finish(self) -> List[DayPlan]:
+        """Flush the last day at the end of the stream"""
+        completed = []
+        if self._started and self._pending:
+            day = self._consume_line(self._pending)
+            if day:
+                completed.append(day)
+        self._pending = ""
+        day = self._close_day()
+        if day:
+            completed.append(day)
+        return completed
+
+    def _consume_line(self, line: str) -> Optional[DayPlan]:
+        match = DAY_HEADER.match(line)
+        if not match:
+            heading = HEADING.match(line)
+            if heading and self._level and len(heading.group(1)) <= self._level:
+                # A sibling section such as "## Tips" ends the current day
+                return self._close_day()
+            if self._day is not None:
+                self._lines.append(line)
+            return None
+        completed = self._close_day()
+        self._day = int(match.group("day"))
+        title = match.group("title") or match.group("heading_title") or match.group("bold_title") or ""
+        self._title = title.strip(" *#")
+        self._level = len((match.group("heading") or "").strip())
+        self._lines = []
+        return completed
+
+    def _close_day(self) -> Optional[DayPlan]:
+        if self._day is None:
+            return None
+        content = "\n".join(self._lines).strip()
+        day = DayPlan(
+            day=self._day,
+            title=self._title,
+            content=content,
+            places=self.extract_places(content),
+            costs=COST.findall(content),
+            source=self.source
+        )
+        self._day, self._title, self._level, self._lines = None, "", 0, []
+        return day
+
+    @staticmethod
+    def extract_places(content: str) -> List[str]:
+        """Bold names and the leading phrase of bullet items, without section labels.
+
+        "the Louvre Museum" and "Louvre Museum" count as one place; the first
+        spelling is kept, minus a lowercase leading article.
+        """
+        places = [name.strip(" :") for name in BOLD.findall(content)]
+        for line in content.splitlines():
+            bullet = BULLET.match(line)
+            if bullet:
+                item = TIME_OF_DAY.sub("", BOLD.sub(r"\1", bullet.group(1))).strip()
+                item = LEAD_VERB.sub("", item)
+                name = re.split(r"\s[-–—]\s|:|\(|,", item, maxsplit=1)[0].strip(" *.")
+                if name and len(name) <= 80:
+                    places.append(name)
+        unique, seen = [], set()
+        for place in places:
+            place = re.sub(r"^(?:the|a|an)\s+", "", place)
+            key = ARTICLE.sub("", place).lower()
+            if place and key not in seen and not SECTION_LABEL.match(place):
+                seen.add(key)
+                unique.append(place)
+        return unique
+
+def parse_itinerary(text: str, source: str = "") -> List[DayPlan]:
+    """Parse a complete output in one go"""
+    parser = ItineraryStreamParser(source, start_marker=None)
+    return parser.feed(text) + parser.finish()
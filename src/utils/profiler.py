@@ -0,0 +1,205 @@
+# src/utils/profiler.py
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import timeit
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+FrameKey = Tuple[str, str, int]
+
+PROFILE_DIR = os.getenv('PROFILE_DIR', '.profiles')
+
+class SamplingProfiler:
+    """Samples the stacks of the tracked threads at a fixed interval.
+
+    Threads join with track_current_thread(): the plan run's worker, event
+    loop and agent threads plus the session's script thread, so agent
+    creation, task execution, the activity pipeline and rendering all show
+    up in one profile without other sessions' runs. Nothing runs until
+    start() is called.
+    """
+
+    def __init__(self, interval: float = 0.005, max_samples: int = 200_000):
+        self.interval = interval
+        self.max_samples = max_samples
+        self.frames: List[FrameKey] = []
+        self._frame_index: Dict[FrameKey, int] = {}
+        self.samples: Dict[int, List[Tuple[List[int], float]]] = {}
+        self.thread_names: Dict[int, str] = {}
+        self.thread_ids: Set[int] = set()
+        self.started_at = 0.0
+        self.stopped_at = 0.0
+        self._sample_count = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SamplingProfiler":
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.stopped_at = time.time()
+
+    def track_current_thread(self) -> None:
+        self.thread_ids.add(threading.get_ident())
+
+    def untrack_current_thread(self) -> None:
+        self.thread_ids.discard(threading.get_ident())
+
+    def _frame_id(self, frame) -> int:
+        code = frame.f_code
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        index = self._frame_index.get(key)
+        if index is None:
+            index = self._frame_index[key] = len(self.frames)
+            self.frames.append(key)
+        return index
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval) and self._sample_count < self.max_samples:
+            now = time.perf_counter()
+            weight, last = now - last, now
+            names = {t.ident: t.name for t in threading.enumerate()}
+            tracked = set(self.thread_ids)
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or thread_id not in tracked:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame_id(frame))
+                    frame = frame.f_back
+                stack.reverse()
+                self.samples.setdefault(thread_id, []).append((stack, weight))
+                self.thread_names[thread_id] = names.get(thread_id, str(thread_id))
+                self._sample_count += 1
+
+    def to_speedscope(self, name: str = "Travel plan run") -> Dict:
+        """Export samples in speedscope's file format, one profile per thread"""
+        profiles = []
+        for thread_id, samples in self.samples.items():
+            profiles.append({
+                "type": "sampled",
+                "name": self.thread_names.get(thread_id, str(thread_id)),
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weight for _, weight in samples),
+                "samples": [stack for stack, _ in samples],
+                "weights": [weight for _, weight in samples]
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "src.utils.profiler",
+            "shared": {"frames": [
+                {"name": func, "file": filename, "line": line} for func, filename, line in self.frames
+            ]},
+            "profiles": profiles
+        }
+
+    def to_folded(self) -> str:
+        """Export collapsed stacks, the input format of flamegraph.pl and similar tools"""
+        counts: Counter = Counter()
+        for thread_id, samples in self.samples.items():
+            thread = self.thread_names.get(thread_id, str(thread_id))
+            for stack, _ in samples:
+                names = [thread] + [f"{self.frames[i][0]} ({os.path.basename(self.frames[i][1])})" for i in stack]
+                counts[";".join(names)] += 1
+        return "\n".join(f"{stack} {count}" for stack, count in counts.items())
+
+    def save(self, basename: str) -> Dict[str, str]:
+        """Write speedscope and folded-stack files, returning their paths"""
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        paths = {
+            "speedscope": os.path.join(PROFILE_DIR, f"{basename}.speedscope.json"),
+            "folded": os.path.join(PROFILE_DIR, f"{basename}.folded.txt")
+        }
+        with open(paths["speedscope"], 'w', encoding='utf-8') as f:
+            json.dump(self.to_speedscope(), f)
+        with open(paths["folded"], 'w', encoding='utf-8') as f:
+            f.write(self.to_folded())
+        return paths
+
+class ProfileRegistry:
+    """Profiles of in-progress plan runs, keyed by session id and by run id"""
+    _lock = threading.Lock()
+    _active: Dict[str, SamplingProfiler] = {}
+    _runs: Dict[str, SamplingProfiler] = {}
+    _run_finished: Dict[str, bool] = {}
+
+    @classmethod
+    def start(cls, session_id: str, run_id: str) -> SamplingProfiler:
+        """Profile a session's run, starting with the calling (script) thread"""
+        profiler = SamplingProfiler()
+        profiler.track_current_thread()
+        with cls._lock:
+            previous = cls._active.pop(session_id, None)
+            cls._active[session_id] = profiler
+            cls._runs = {r: p for r, p in cls._runs.items() if p is not previous}
+            cls._runs[run_id] = profiler
+            cls._run_finished[session_id] = False
+        if previous:
+            previous.stop()
+        return profiler.start()
+
+    @classmethod
+    def is_active(cls, session_id: str) -> bool:
+        return session_id in cls._active
+
+    @classmethod
+    def track_thread(cls, run_id: Optional[str]) -> None:
+        """Include the calling thread in the run's profile, if the run is being profiled"""
+        profiler = cls._runs.get(run_id)
+        if profiler:
+            profiler.track_current_thread()
+
+    @classmethod
+    def untrack_thread(cls, run_id: Optional[str]) -> None:
+        """Stop sampling a pooled thread once it has finished working on the run"""
+        profiler = cls._runs.get(run_id)
+        if profiler:
+            profiler.untrack_current_thread()
+
+    @classmethod
+    def track_session_thread(cls, session_id: str) -> None:
+        """Include the session's current script thread; each rerun may run on a new one"""
+        profiler = cls._active.get(session_id)
+        if profiler:
+            profiler.track_current_thread()
+
+    @classmethod
+    def mark_run_finished(cls, session_id: str) -> None:
+        with cls._lock:
+            if session_id in cls._active:
+                cls._run_finished[session_id] = True
+
+    @classmethod
+    def finish_if_done(cls, session_id: str) -> Optional[Dict[str, str]]:
+        """Stop and save the session's profile once its run and a final render have completed"""
+        with cls._lock:
+            if not cls._run_finished.get(session_id):
+                return None
+            profiler = cls._active.pop(session_id)
+            del cls._run_finished[session_id]
+            cls._runs = {r: p for r, p in cls._runs.items() if p is not profiler}
+        profiler.stop()
+        return profiler.save(f"{session_id[:8]}-{int(profiler.started_at)}")
+
+@functools.lru_cache(maxsize=None)
+def measure_disabled_overhead(iterations: int = 100_000) -> float:
+    """Nanoseconds per call spent in the profiling check when no profile is active.
+
+    Measured once per process, on first use.
+    """
+    seconds = timeit.timeit(lambda: ProfileRegistry.track_thread("no-such-run"), number=iterations)
+    return seconds / iterations * 1e9
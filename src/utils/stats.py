@@ -0,0 +1,11 @@
+# src/utils/stats.py
+import math
+from typing import Sequence
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile, 0.0 for an empty sample"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
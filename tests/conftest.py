@@ -0,0 +1,26 @@
+# tests/conftest.py
+import os
+import pytest
+
+# crewai sends telemetry from every agent unless this is set
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+@pytest.fixture
+def stub_llm(monkeypatch):
+    """Start ReplayStubServer instances and point the agents' LLM settings at the first one"""
+    from src.agents import travel_agents
+    from src.loadtest.stub_server import ReplayStubServer
+
+    servers = []
+
+    def start(**kwargs) -> ReplayStubServer:
+        server = ReplayStubServer([], **kwargs).start()
+        servers.append(server)
+        if len(servers) == 1:
+            monkeypatch.setattr(travel_agents, "OPENAI_API_KEY", "stub")
+            monkeypatch.setattr(travel_agents, "OPENAI_API_BASE", server.base_url)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
@@ -0,0 +1,26 @@
+# tests/test_cancellation.py
+import pytest
+from crewai import Task
+from src.utils.cancellation import CancellationToken, RunCancelledError
+
+def test_token_limit_counts_reported_usage():
+    token = CancellationToken(token_limit=100)
+    token.stats.tokens_streamed = 20
+    assert not token.cancelled
+    token.stats.prompt_tokens = 90  # Reported by the backend after the call
+    assert token.cancelled and token.reason == "token limit reached"
+
+def test_agent_stops_once_reported_usage_exceeds_the_limit(stub_llm):
+    from src.agents.travel_agents import create_agent
+
+    stub_llm(time_scale=0.01)  # Reports 100 prompt and 20 completion tokens per call
+    token = CancellationToken(token_limit=130)
+    agent = create_agent('travel_planner', 'stub', token=token)
+    task = Task(description="Plan a trip", expected_output="An itinerary", agent=agent)
+    agent.execute_task(task)
+    assert token.stats.tokens_used == 120 and not token.cancelled
+
+    # Counting the first call's reported prompt, the second crosses the limit while streaming
+    with pytest.raises(RunCancelledError, match="token limit reached"):
+        agent.execute_task(task)
+    assert token.stats.prompt_tokens == 100  # Aborted before its usage arrived
@@ -0,0 +1,26 @@
+# tests/test_cassette.py
+from crewai import Task
+from src.agents import travel_agents
+from src.agents.cassette import Cassette
+from src.loadtest.stub_server import ReplayStubServer
+from src.utils.cancellation import CancellationToken
+
+def plan(agent) -> str:
+    return agent.execute_task(Task(description="Plan a trip", expected_output="An itinerary", agent=agent))
+
+def test_agent_calls_are_recorded_and_replayed(stub_llm, monkeypatch, tmp_path):
+    stub_llm(time_scale=0.01, answer="Thought: I now can give a great answer\nFinal Answer: Day 1: Recorded.")
+    cassette = Cassette(str(tmp_path / "travel.jsonl"))
+    monkeypatch.setattr(travel_agents, "LLM_RECORD_CASSETTE", cassette.path)
+    assert plan(travel_agents.create_agent('travel_planner', 'stub', token=CancellationToken())) == "Day 1: Recorded."
+
+    interactions = cassette.load()
+    assert len(interactions) == 1 and interactions[0].streamed
+
+    monkeypatch.setattr(travel_agents, "LLM_RECORD_CASSETTE", None)
+    replay = ReplayStubServer(interactions, time_scale=0.01).start()
+    try:
+        monkeypatch.setattr(travel_agents, "OPENAI_API_BASE", replay.base_url)
+        assert plan(travel_agents.create_agent('travel_planner', 'stub', token=CancellationToken())) == "Day 1: Recorded."
+    finally:
+        replay.stop()
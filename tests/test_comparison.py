@@ -0,0 +1,18 @@
+# tests/test_comparison.py
+from src.utils.comparison import estimate_total_cost, parse_destinations
+
+def test_commas_and_slashes_stay_inside_names():
+    for value in ["Paris, France", "Portland, Oregon", "Minneapolis/St. Paul"]:
+        assert parse_destinations(value) == ([value], [])
+
+def test_words_and_semicolons_separate_destinations():
+    assert parse_destinations("Lisbon vs. Porto or Madrid; Seville") == (["Lisbon", "Porto", "Madrid", "Seville"], [])
+    assert parse_destinations("Paris, France vs Rome, Italy") == (["Paris, France", "Rome, Italy"], [])
+
+def test_destinations_beyond_the_limit_are_reported():
+    assert parse_destinations("A; B; C; D; E; b", limit=4) == (["A", "B", "C", "D"], ["E"])
+
+def test_costs_are_totalled_per_currency():
+    assert estimate_total_cost(["€10-20", "Museum 5", "€30"]) == "≈ €50"
+    assert estimate_total_cost(["€20", "¥3,000", "$5"]) == "≈ €20 + ¥3,000 + $5"
+    assert estimate_total_cost(["free"]) is None
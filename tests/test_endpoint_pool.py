@@ -0,0 +1,63 @@
+# tests/test_endpoint_pool.py
+import random
+import httpx
+from src.agents.endpoint_pool import EndpointPool, PooledTransport
+
+URLS = ["http://llm-a:8000/v1", "http://llm-b:8000/v1", "http://llm-c:8000/v1"]
+
+def make_pool(**kwargs) -> EndpointPool:
+    return EndpointPool(URLS, health_interval=0, **kwargs)
+
+def test_degraded_endpoint_is_ejected():
+    pool = make_pool()
+    rng = random.Random(7)
+    # llm-c is usually fast but stalls on a fifth of its requests
+    for _ in range(300):
+        batch = [pool.acquire() for _ in range(3)]
+        for endpoint in batch:
+            stalled = endpoint.base_url == URLS[2] and rng.random() < 0.2
+            pool.record(endpoint, rng.uniform(2.0, 4.0) if stalled else rng.uniform(0.1, 0.2), ok=True)
+            pool.release(endpoint)
+    ejections = {e.base_url: e.ejections for e in pool.endpoints}
+    assert ejections[URLS[2]] >= 1
+    assert ejections[URLS[0]] == ejections[URLS[1]] == 0
+
+def test_uniform_latency_ejects_nothing():
+    pool = make_pool()
+    rng = random.Random(7)
+    for _ in range(300):
+        endpoint = pool.acquire()
+        pool.record(endpoint, rng.uniform(0.1, 0.3), ok=True)
+        pool.release(endpoint)
+    assert all(e.ejections == 0 for e in pool.endpoints)
+
+def test_rewritten_request_targets_the_endpoint_host():
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append((str(request.url), request.headers["host"]))
+        return httpx.Response(200, json={})
+
+    pool = make_pool()
+    transport = PooledTransport(pool, transport=httpx.MockTransport(handler))
+    with httpx.Client(base_url=pool.base_url, transport=transport) as client:
+        for _ in range(3):
+            client.post("/chat/completions", json={}).read()
+    assert sorted(seen) == [
+        ("http://llm-a:8000/v1/chat/completions", "llm-a:8000"),
+        ("http://llm-b:8000/v1/chat/completions", "llm-b:8000"),
+        ("http://llm-c:8000/v1/chat/completions", "llm-c:8000"),
+    ]
+
+def test_agent_calls_go_through_the_pool(stub_llm):
+    from crewai import Task
+    from src.agents.travel_agents import create_agent
+    from src.utils.cancellation import CancellationToken
+
+    servers = [stub_llm(time_scale=0.01) for _ in range(2)]
+    pool = EndpointPool([s.base_url for s in servers], api_key="stub", health_interval=0)
+    agent = create_agent('travel_planner', 'stub', token=CancellationToken(), pool=pool)
+    for _ in range(4):
+        agent.execute_task(Task(description="Plan a trip", expected_output="An itinerary", agent=agent))
+    requests = [e["requests"] for e in pool.snapshot()["endpoints"]]
+    assert sum(requests) == 4 and min(requests) >= 1
@@ -0,0 +1,49 @@
+# tests/test_itinerary_parser.py
+from src.utils.itinerary_parser import ItineraryStreamParser, parse_itinerary
+
+def test_heading_forms_start_days():
+    text = (
+        "## Day 1: Arrival\nCheck in.\n"
+        "**Day 2** - Old Town\nWalk around.\n"
+        "Day 3: Museums\nSee art.\n"
+        "### Day 4\nRelax."
+    )
+    days = parse_itinerary(text)
+    assert [(d.day, d.title) for d in days] == [(1, "Arrival"), (2, "Old Town"), (3, "Museums"), (4, "")]
+
+def test_prose_mentioning_a_day_does_not_split():
+    text = (
+        "## Day 1: Arrival\n"
+        "Day 1 of your trip is great for settling in.\n"
+        "On Day 2 you could also come back here.\n"
+        "## Day 2: Markets\nShop."
+    )
+    days = parse_itinerary(text)
+    assert [d.day for d in days] == [1, 2]
+    assert "Day 1 of your trip" in days[0].content
+
+def test_streamed_chunks_match_whole_output():
+    text = "Thought: plan\nFinal Answer:\n## Day 1: A\n- **Belem Tower**\n## Day 2: B\n- Alfama\n"
+    parser = ItineraryStreamParser()
+    days = []
+    for i in range(0, len(text), 7):
+        days += parser.feed(text[i:i + 7])
+    days += parser.finish()
+    assert [(d.day, d.places) for d in days] == [(1, ["Belem Tower"]), (2, ["Alfama"])]
+
+def test_section_labels_are_not_places():
+    content = (
+        "**Morning:**\n- Visit the Louvre Museum\n"
+        "**Late Afternoon**\n- Afternoon: Tuileries Garden\n"
+        "- Dinner: Le Comptoir (€30)\n**Tips**"
+    )
+    places = ItineraryStreamParser.extract_places(content)
+    assert places == ["Louvre Museum", "Tuileries Garden", "Le Comptoir"]
+
+def test_leading_articles_do_not_duplicate_places():
+    content = (
+        "- Visit the Louvre Museum (2 hours)\n"
+        "- **Louvre Museum**: buy tickets online\n"
+        "- The Louvre Museum - closed on Tuesdays"
+    )
+    assert ItineraryStreamParser.extract_places(content) == ["Louvre Museum"]
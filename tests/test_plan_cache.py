@@ -0,0 +1,26 @@
+# tests/test_plan_cache.py
+import pytest
+from src.state.plan_cache import PlanCache
+from src.state.state_manager import TravelPreferences
+
+PREFERENCES = TravelPreferences(destination="Lisbon", duration=3, budget="Moderate", interests=["Food"])
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(PlanCache, "_entries", {})
+    yield
+    PlanCache.configure(6 * 3600, (9, 21))
+
+def test_interactive_plans_are_cached_only_when_enabled():
+    PlanCache.configure(3600, (9, 21), cache_interactive=False)
+    PlanCache.put(PREFERENCES, "Day 1: Alfama", tokens=100, source="interactive")
+    assert PlanCache.get(PREFERENCES) is None
+
+    PlanCache.put(PREFERENCES, "Day 1: Alfama", tokens=100, source="warm")
+    assert PlanCache.get(PREFERENCES).source == "warm"
+
+def test_equivalent_preferences_share_an_entry():
+    PlanCache.configure(3600, (9, 21))
+    PlanCache.put(PREFERENCES, "Day 1: Alfama", tokens=100, source="interactive")
+    same = TravelPreferences(destination="  lisbon ", duration=3, budget="Moderate", interests=["Food"])
+    assert PlanCache.get(same).plan == "Day 1: Alfama"
@@ -0,0 +1,31 @@
+# tests/test_routing.py
+import asyncio
+import itertools
+import time
+from crewai import Task
+from src.agents.async_tracked_agent import AsyncActivityEmitter
+from src.agents.model_router import ModelRouter
+from src.tasks.task_graph import TaskNode
+from src.utils.cancellation import CancellationToken
+
+def test_timed_out_attempt_is_cancelled_and_stays_silent(stub_llm):
+    from app import process_task_async, run_routed_task
+    from src.agents.travel_agents import create_agent
+
+    calls = itertools.count()
+    server = stub_llm(time_scale=0.01, extra_delay=lambda: 1.5 if next(calls) == 0 else 0.0)
+    router = ModelRouter("slow", tiers={"default": ["slow", "fast"]}, task_slas={"travel_planner": 0.5})
+    token = CancellationToken()
+    agent = create_agent('travel_planner', 'slow', True, token)
+    node = TaskNode(name='travel_planner', task=Task(description="Plan a trip", expected_output="An itinerary", agent=agent))
+
+    result = asyncio.run(run_routed_task(node, "Lisbon", router, {'travel_planner': 'slow'},
+                                         process_task_async, True, token))
+    assert result == "Day 1: Explore the city centre."
+    time.sleep(2.0)  # Long enough for the abandoned call to have answered
+
+    assert server.requests_served == 2
+    activities = [a["content"] for a in AsyncActivityEmitter.get_pending_activities(token.run_id)]
+    assert sum(content.startswith("✅ Task output") for content in activities) == 1
+    assert not any(content.startswith("❌") for content in activities)
+    assert not token.cancelled
@@ -0,0 +1,87 @@
+# tests/test_scheduler.py
+import asyncio
+import pytest
+from crewai import LLM, Agent, Task
+from src.agents.async_tracked_agent import AsyncActivityEmitter
+from src.tasks.scheduler import DAGScheduler
+from src.tasks.task_graph import TaskGraph, TaskNode
+from src.tasks.travel_tasks import TravelTaskManager
+from src.utils.cancellation import CancellationToken, RunCancelledError
+
+def node(name: str, depends_on=(), optional: bool = False) -> TaskNode:
+    agent = Agent(role=name.replace('_', ' ').title(), goal="Plan", backstory="Travel", llm=LLM(model="stub"))
+    task = Task(description=f"Do the {name} part", expected_output="Notes", agent=agent)
+    return TaskNode(name=name, task=task, depends_on=list(depends_on), optional=optional)
+
+def travel_graph() -> TaskGraph:
+    graph = TaskGraph(merge=TravelTaskManager.merge_results)
+    graph.add(node('travel_planner'))
+    for name in ('budget_analyst', 'food_guide', 'transport_planner'):
+        graph.add(node(name, ['travel_planner'], optional=True))
+    return graph
+
+def executor(fail=(), delays=None, on_start=None):
+    async def execute(task_node, context):
+        if on_start:
+            on_start(task_node.name)
+        await asyncio.sleep((delays or {}).get(task_node.name, 0.0))
+        if task_node.name in fail:
+            raise ValueError(f"{task_node.name} is down")
+        return f"{task_node.name} notes"
+    return execute
+
+def test_failed_specialist_is_left_out_of_the_plan():
+    token = CancellationToken()
+    result = asyncio.run(DAGScheduler().run(travel_graph(), executor(fail={'food_guide'}), token))
+
+    assert result.failed == ['food_guide']
+    assert "## Budget" in result.final_output and "## Getting Around" in result.final_output
+    assert "## Where to Eat" not in result.final_output
+    errors = [a["content"] for a in AsyncActivityEmitter.get_pending_activities(token.run_id) if a["type"] == "error"]
+    assert len(errors) == 1 and "Food Guide" in errors[0] and "food_guide is down" in errors[0]
+
+def test_required_or_depended_on_failures_fail_the_run():
+    with pytest.raises(ValueError, match="travel_planner is down"):
+        asyncio.run(DAGScheduler().run(travel_graph(), executor(fail={'travel_planner'})))
+
+    graph = travel_graph()
+    graph.add(node('review', ['food_guide']))  # food_guide is no longer a leaf
+    with pytest.raises(ValueError, match="food_guide is down"):
+        asyncio.run(DAGScheduler().run(graph, executor(fail={'food_guide'})))
+
+def test_cancellation_skips_the_remaining_tasks():
+    token = CancellationToken()
+    started = []
+
+    def on_start(name):
+        started.append(name)
+        token.cancel("user cancelled")
+
+    with pytest.raises(RunCancelledError, match="user cancelled"):
+        asyncio.run(DAGScheduler().run(travel_graph(), executor(delays={'travel_planner': 0.2}, on_start=on_start), token))
+    assert started == ['travel_planner']
+    assert token.stats.tasks_skipped == 3  # The specialists
+
+def test_optional_task_failing_after_cancellation_cancels_the_run():
+    token = CancellationToken()
+
+    async def execute(task_node, context):
+        if task_node.name == 'food_guide':
+            token.cancel("superseded")
+            raise ConnectionError("client closed")  # How an aborted request surfaces
+        return f"{task_node.name} notes"
+
+    with pytest.raises(RunCancelledError, match="superseded"):
+        asyncio.run(DAGScheduler().run(travel_graph(), execute, token))
+
+def test_critical_path_follows_the_slowest_chain():
+    graph = travel_graph()
+    graph.add(node('review', ['budget_analyst', 'food_guide']))
+    durations = {'travel_planner': 1.0, 'budget_analyst': 0.5, 'food_guide': 2.0, 'transport_planner': 2.5, 'review': 1.0}
+    assert graph.critical_path(durations) == ['travel_planner', 'food_guide', 'review']
+
+    result = asyncio.run(DAGScheduler().run(
+        travel_graph(), executor(delays={'travel_planner': 0.1, 'budget_analyst': 0.3, 'food_guide': 0.2})
+    ))
+    assert result.critical_path == ['travel_planner', 'budget_analyst']
+    assert result.wall_time < result.total_task_time  # The specialists ran in parallel
@@ -0,0 +1,53 @@
+# tests/test_streaming_llm.py
+import threading
+import time
+import pytest
+from crewai import Task
+from src.agents.streaming_llm import StreamingLLM
+from src.agents.travel_agents import create_agent
+from src.state.itinerary_store import ItineraryStore
+from src.utils.cancellation import CancellationToken, RunCancelledError
+
+def plan_task(agent) -> Task:
+    return Task(description="Plan a trip", expected_output="An itinerary", agent=agent)
+
+def test_agent_calls_stream_through_our_client(stub_llm):
+    stub_llm(time_scale=0.05)
+    token = CancellationToken()
+    agent = create_agent('travel_planner', 'stub', token=token)
+    assert isinstance(agent.llm, StreamingLLM)  # Not replaced by crewai's litellm LLM
+
+    assert agent.execute_task(plan_task(agent)) == "Day 1: Explore the city centre."
+    assert token.stats.tokens_streamed > 0
+    assert (token.stats.prompt_tokens, token.stats.completion_tokens) == (100, 20)
+
+def test_cancelling_the_token_aborts_the_call(stub_llm):
+    stub_llm(time_scale=4.0)  # 2s to first byte
+    token = CancellationToken()
+    agent = create_agent('travel_planner', 'stub', token=token)
+    threading.Timer(0.2, token.cancel, args=("user cancelled",)).start()
+
+    started = time.time()
+    with pytest.raises(RunCancelledError):
+        agent.execute_task(plan_task(agent))
+    assert time.time() - started < 1.0
+
+def test_itinerary_days_are_published_while_the_planner_streams(stub_llm, monkeypatch):
+    stub_llm(time_scale=0.2, answer=(
+        "Thought: I now can give a great answer\nFinal Answer:\n"
+        "## Day 1: Arrival\n- **Belem Tower**\n## Day 2: Old Town\n- Alfama\n## Day 3: Coast\n- Cascais"
+    ))
+    token = CancellationToken()
+    ItineraryStore.start_run(token.run_id, token.stats.started_at)
+    agent = create_agent('travel_planner', 'stub', token=token)
+    published = []
+    publish = ItineraryStore.publish
+    monkeypatch.setattr(ItineraryStore, "publish", lambda run_id, day, rank=0: (
+        published.append((day.day, token.stats.tokens_streamed)), publish(run_id, day, rank)
+    ))
+
+    agent.execute_task(plan_task(agent))
+    days = ItineraryStore.get_days(token.run_id)
+    assert [(d["day"], d["places"]) for d in days] == [(1, ["Belem Tower"]), (2, ["Alfama"]), (3, ["Cascais"])]
+    # Days 1 and 2 went out as soon as the next heading streamed in, not after the answer
+    assert [day for day, streamed in published if streamed < token.stats.tokens_streamed] == [1, 2]
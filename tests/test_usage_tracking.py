@@ -0,0 +1,21 @@
+# tests/test_usage_tracking.py
+from crewai import Task
+from src.agents.travel_agents import create_agent
+from src.agents.usage_tracking import PromptCacheStats
+from src.loadtest.stub_server import PrefixCacheSimulator
+from src.utils.cancellation import CancellationToken
+
+def test_agent_calls_report_backend_usage_and_cached_tokens(stub_llm):
+    stub_llm(time_scale=0.01, prefix_cache=PrefixCacheSimulator())
+    PromptCacheStats.reset()
+    token = CancellationToken()
+
+    # The same prompt twice: once without a run (a plain JSON response), once streamed for a run
+    for agent in (create_agent('local_expert', 'stub'), create_agent('local_expert', 'stub', token=token)):
+        agent.execute_task(Task(description="Review the plan", expected_output="A better plan", agent=agent))
+
+    stats = PromptCacheStats.snapshot()
+    assert stats["requests"] == 2
+    assert stats["cache_hits"] == 1
+    assert 0 < stats["cached_tokens"] <= stats["prompt_tokens"] // 2
+    assert token.stats.prompt_tokens == stats["prompt_tokens"] // 2